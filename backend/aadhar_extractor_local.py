@@ -1,6 +1,31 @@
+import os
 import re
 import json
 from pathlib import Path
+import ocr_engine
+from ocr_engine import pixmap_to_array
+from aadhar_text_scanner import scan_aadhar_text
+
+# Anchor text used to locate the Aadhar fields on a low-resolution pass
+# 12 digits in groups of four, but not the 16-digit VID
+NUMBER_ANCHOR = re.compile(r'(?<!\d)(?<!\d )\d{4}\s?\d{4}\s?\d{4}(?!\s?\d)')
+DOB_ANCHOR = re.compile(r'DOB|BIRTH|\d{2}[\/\-]\d{2}[\/\-]\d{4}', re.IGNORECASE)
+GENDER_ANCHOR = re.compile(r'MALE', re.IGNORECASE)
+ADDRESS_ANCHOR = re.compile(r'\bADDRESS\b', re.IGNORECASE)
+PIN_ANCHOR = re.compile(r'\b\d{6}\b')
+
+# Fields each located region is expected to contain
+REGION_FIELDS = {
+    'number': {'aadhar_number'},
+    'identity': {'name', 'dob', 'gender'},
+    'address': {'address'}
+}
+
+FIELDS = ['aadhar_number', 'name', 'dob', 'gender', 'address']
+
+def parse_zooms(value):
+    """Parse a comma-separated zoom ladder such as "1.5,3" into ascending floats"""
+    return sorted(float(zoom) for zoom in value.split(',') if zoom.strip())
 
 class AadharExtractorLocal:
     def __init__(self):
@@ -12,197 +37,202 @@ class AadharExtractorLocal:
             'address': None,
             'raw_text': ''
         }
-        self.ocr_reader = None
-
-    def get_ocr_reader(self):
-        """Initialize EasyOCR reader with optimizations"""
-        if self.ocr_reader is None:
-            try:
-                import easyocr
-                import os
-                os.environ['EASYOCR_MODULE_PATH'] = os.path.expanduser('~/.EasyOCR')
-                self.ocr_reader = easyocr.Reader(['en'], gpu=False, verbose=False, download_enabled=False)
-            except ImportError:
-                print("EasyOCR not installed. Please install: pip install easyocr")
-                return None
-            except Exception as e:
-                print(f"EasyOCR initialization error: {e}")
-                return None
-        return self.ocr_reader
-
-    def clean_text_line(self, line):
-        """Clean unwanted characters and Hindi text"""
-        # Remove Hindi/Devanagari characters
-        line = re.sub(r'[\u0900-\u097F]+', '', line)
-        # Remove other non-English characters but keep alphanumeric, spaces, and common punctuation
-        line = re.sub(r'[^A-Za-z0-9\s,./-]+', ' ', line)
-        # Remove extra spaces
-        line = ' '.join(line.split()).strip()
-        return line
-
-    def extract_aadhar_number(self, text):
-        """Extract 12-digit aadhar number"""
-        patterns = [
-            r'\b(\d{4})\s+(\d{4})\s+(\d{4})\b',
-            r'\b(\d{4})-(\d{4})-(\d{4})\b',
-            r'\b(\d{12})\b'
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for m in matches:
-                num = ''.join(m) if isinstance(m, tuple) else m
-                if len(num) == 12 and num.isdigit() and num[0] not in ['0', '1']:
-                    return f"{num[:4]} {num[4:8]} {num[8:]}"
-        return None
-
-    def extract_dob(self, text):
-        """Extract DOB in dd/mm/yyyy or dd-mm-yyyy"""
-        patterns = [
-            r'DOB[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-            r'Birth[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-            r'\b(\d{2})[\/\-](\d{2})[\/\-](19|20\d{2})\b'
-        ]
-        for pat in patterns:
-            match = re.search(pat, text, re.IGNORECASE)
-            if match:
-                return f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
-        return None
+        # "roi" OCRs only the located field regions, "full" OCRs whole pages
+        self.ocr_mode = os.getenv('AADHAR_OCR_MODE', 'roi').lower()
+        # OCR starts at the lowest zoom and only re-renders what is still missing
+        self.page_zooms = parse_zooms(os.getenv('AADHAR_OCR_ZOOMS', '1.5,3'))
+        self.roi_locate_zoom = float(os.getenv('AADHAR_ROI_LOCATE_ZOOM', '1.0'))
+        self.roi_zooms = parse_zooms(os.getenv('AADHAR_ROI_ZOOMS', '1.5,3'))
+        self.ocr_pixels = 0
+        # Decode the UIDAI QR code before falling back to text extraction and OCR
+        self.qr_enabled = os.getenv('AADHAR_QR_ENABLED', 'true').lower() == 'true'
+        self.qr_locate_zoom = float(os.getenv('AADHAR_QR_LOCATE_ZOOM', '2'))
+        self.qr_decode_zoom = float(os.getenv('AADHAR_QR_DECODE_ZOOM', '6'))
+        self.qr_data = None
+        # Fields still to be found in the text once the QR code has been read
+        self.wanted_fields = list(FIELDS)
 
-    def extract_name(self, text):
-        """Extract name from line above DOB"""
-        lines = [l.strip() for l in text.split('\n') if l.strip()]
-        for i, line in enumerate(lines):
-            if 'DOB' in line.upper() or re.search(r'\d{2}[\/\-]\d{2}[\/\-]\d{4}', line):
-                for j in range(i - 1, max(-1, i - 4), -1):
-                    prev = self.clean_text_line(lines[j])
-                    if re.match(r'^[A-Za-z\s.]{3,50}$', prev):
-                        return prev.strip()
-        return None
-
-    def extract_gender(self, text):
-        """Extract gender (handles IFEMALE, IMALE, etc.)"""
-        text_u = text.upper()
-        if re.search(r'I?FEMALE', text_u):
-            return "Female"
-        if re.search(r'I?MALE', text_u) and 'FEMALE' not in text_u:
-            return "Male"
-        return None
-
-    def extract_address(self, text):
-        """Extract address from page 2 after 'Address' keyword"""
-        lines = [self.clean_text_line(l) for l in text.split('\n') if l.strip()]
-        
-        address_lines = []
-        found_address_keyword = False
-        
-        for i, line in enumerate(lines):
-            line_upper = line.upper()
-            
-            if re.search(r'\bADDRESS\b', line_upper) and len(line) < 30:
-                found_address_keyword = True
-                if ':' in line:
-                    after_colon = line.split(':', 1)[1].strip()
-                    if len(after_colon) > 3:
-                        address_lines.append(after_colon)
-                continue
-            
-            if found_address_keyword:
-                if len(line) < 3:
-                    continue
-                
-                if re.search(r'\d{4}\s?\d{4}\s?\d{4}', line):
-                    continue
-                
-                if any(keyword in line_upper for keyword in ['GOVERNMENT', 'UIDAI', 'UNIQUE', 'ISSUED']):
-                    continue
-                
-                is_address_line = any([
-                    re.search(r'\b\d{6}\b', line),
-                    any(w in line_upper for w in ['S/O', 'C/O', 'D/O', 'W/O']),
-                    any(w in line_upper for w in ['DIST', 'DISTRICT', 'STATE', 'VILLAGE', 'CITY', 'TOWN']),
-                    ',' in line,
-                    re.search(r'\b(ROAD|STREET|LANE|COLONY|NAGAR|GANJ|PUR)\b', line_upper),
-                    len(line) > 10
-                ])
-                
-                if is_address_line:
-                    address_lines.append(line)
-                    
-                if len(address_lines) >= 5:
-                    break
-                    
-                if any(keyword in line_upper for keyword in ['ENROLLMENT', 'DOWNLOAD', 'HELP']):
-                    break
-        
-        if not address_lines:
-            for i, line in enumerate(lines):
-                if re.search(r'\b\d{6}\b', line):
-                    start = max(0, i - 3)
-                    for j in range(start, min(i + 2, len(lines))):
-                        clean_line = lines[j]
-                        if (len(clean_line) > 5 and 
-                            not re.search(r'\d{4}\s?\d{4}\s?\d{4}', clean_line) and
-                            not any(k in clean_line.upper() for k in ['GOVERNMENT', 'UIDAI'])):
-                            address_lines.append(clean_line)
-                    if address_lines:
-                        break
-        
-        if address_lines:
-            seen = set()
-            unique_lines = []
-            for line in address_lines:
-                if line not in seen:
-                    seen.add(line)
-                    unique_lines.append(line)
-            
-            return ', '.join(unique_lines)
-        
-        return None
-
-    def process_pdf(self, pdf_path):
+    def process_pdf(self, pdf_path, pdf_bytes=None):
         """Try to extract text directly, fallback to OCR"""
         try:
             import fitz
-            from PIL import Image
-            import io, os
             
-            text = ''
-            with fitz.open(pdf_path) as doc:
+            # Open the document once, from memory when the upload is buffered
+            if pdf_bytes is not None:
+                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            else:
+                doc = fitz.open(pdf_path)
+
+            with doc:
+                if self.qr_enabled:
+                    self.qr_data = self._read_qr(doc)
+                    if self.qr_data:
+                        self.wanted_fields = [field for field in FIELDS if not self.qr_data.get(field)]
+                        if not self.wanted_fields:
+                            return ''
+
+                text = ''
                 for page in doc:
                     text += page.get_text() + "\n"
-            
-            if len(text.strip()) > 50:
-                return text
-            
-            # Fallback to OCR
-            reader = self.get_ocr_reader()
-            if not reader:
-                return text
                 
-            for i, page in enumerate(fitz.open(pdf_path)):
-                pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))
-                img = Image.open(io.BytesIO(pix.tobytes("png")))
-                temp = f"temp_{i}.png"
-                img.save(temp)
-                text += "\n".join(reader.readtext(temp, detail=0)) + "\n"
-                os.remove(temp)
-            return text
+                if len(text.strip()) > 50:
+                    return text
+                
+                # Fallback to OCR
+                if not ocr_engine.ocr_ready():
+                    return text
+
+                if self.ocr_mode == 'roi':
+                    roi_text = self._ocr_document_regions(doc)
+                    if not self._missing_fields(roi_text):
+                        return text + roi_text
+                    print("ROI OCR missed some fields, falling back to full-page OCR")
+
+                return text + self._ocr_pages_progressive(doc)
         except Exception as e:
-            return f"Error processing PDF: {str(e)}"
+            # Fail the stage rather than let the message pass for extracted text
+            raise RuntimeError(f"Error processing PDF: {e}") from e
+
+    def _read_qr(self, doc):
+        try:
+            from aadhar_qr import AadharQRReader
+            return AadharQRReader(self.qr_locate_zoom, self.qr_decode_zoom).read_document(doc)
+        except ImportError:
+            print("OpenCV not installed, skipping Aadhar QR decoding")
+        except Exception as e:
+            print(f"Aadhar QR error: {e}")
+        return None
+
+    def _ocr_pixmap(self, pix, detail=0):
+        self.ocr_pixels += pix.width * pix.height
+        return ocr_engine.readtext(pixmap_to_array(pix), detail=detail)
+
+    def _ocr_page(self, page, zoom, clip=None):
+        import fitz
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+        return "\n".join(self._ocr_pixmap(pix)) + "\n"
+
+    def _ocr_pages_progressive(self, doc):
+        """OCR whole pages from low to high zoom, stopping once every field is found
+
+        After the first pass, pages are re-OCR'd at the next zoom starting with the
+        ones that yielded the fewest fields, and each re-OCR'd page replaces its
+        lower-resolution text.
+        """
+        page_texts = {}
+        text = ''
+        for level, zoom in enumerate(self.page_zooms):
+            if level == 0:
+                order = range(len(doc))
+            else:
+                order = sorted(page_texts, key=lambda i: -len(self._missing_fields(page_texts[i])))
+            for page_number in order:
+                page_texts[page_number] = self._ocr_page(doc[page_number], zoom)
+                text = ''.join(page_texts[i] for i in sorted(page_texts))
+                if not self._missing_fields(text):
+                    return text
+        return text
 
-    def extract_aadhar_data(self, pdf_path):
+    def _locate_regions(self, page):
+        """Find the number strip, name/DOB block and address block from a low-resolution OCR pass"""
+        import fitz
+        zoom = self.roi_locate_zoom
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        boxes = []
+        for bbox, box_text, _ in self._ocr_pixmap(pix, detail=1):
+            xs = [point[0] for point in bbox]
+            ys = [point[1] for point in bbox]
+            boxes.append((fitz.Rect(min(xs) / zoom, min(ys) / zoom, max(xs) / zoom, max(ys) / zoom), box_text))
+        if not boxes:
+            return []
+
+        heights = sorted(rect.height for rect, _ in boxes)
+        line_height = heights[len(heights) // 2]
+        regions = []
+
+        def text_right(top, bottom):
+            """Right edge of the text lines between two heights"""
+            rights = [rect.x1 for rect, _ in boxes if top <= (rect.y0 + rect.y1) / 2 <= bottom]
+            return max(rights, default=page.rect.x1) + line_height
+
+        # Aadhar number strip
+        for rect, box_text in boxes:
+            if NUMBER_ANCHOR.search(box_text):
+                regions.append(('number', fitz.Rect(rect.x0 - line_height, rect.y0 - 0.5 * line_height,
+                                         rect.x1 + line_height, rect.y1 + 0.5 * line_height)))
+
+        # Name/DOB/gender block: the name sits a line or two above the DOB
+        anchors = [rect for rect, box_text in boxes if DOB_ANCHOR.search(box_text) or GENDER_ANCHOR.search(box_text)]
+        if anchors:
+            top = min(rect.y0 for rect in anchors) - 3 * line_height
+            bottom = max(rect.y1 for rect in anchors) + 0.5 * line_height
+            regions.append(('identity', fitz.Rect(min(rect.x0 for rect in anchors) - line_height, top,
+                                                  text_right(top, bottom), bottom)))
+
+        # Address block: from the "Address" label down to the PIN code
+        labels = [rect for rect, box_text in boxes if ADDRESS_ANCHOR.search(box_text)]
+        if labels:
+            label = labels[0]
+            bottom = label.y1 + 6 * line_height
+            pins = [rect for rect, box_text in boxes
+                    if PIN_ANCHOR.search(box_text) and label.y0 <= rect.y0 <= label.y1 + 8 * line_height]
+            if pins:
+                bottom = max(rect.y1 for rect in pins) + 0.5 * line_height
+            top = label.y0 - 0.25 * line_height
+            regions.append(('address', fitz.Rect(label.x0 - line_height, top, text_right(top, bottom), bottom)))
+
+        regions = [(kind, rect & page.rect) for kind, rect in regions]
+        # Keep the page's reading order so field extractors see lines as printed
+        return sorted([(kind, rect) for kind, rect in regions if not rect.is_empty],
+                      key=lambda region: (region[1].y0, region[1].x0))
+
+    def _ocr_document_regions(self, doc):
+        """OCR only the located field regions, from low to high zoom, stopping once every field is found
+
+        After the first pass, only regions whose fields are still missing are
+        re-OCR'd at the next zoom.
+        """
+        regions = [(page, kind, rect) for page in doc for kind, rect in self._locate_regions(page)
+                   if REGION_FIELDS[kind] & set(self.wanted_fields)]
+        region_texts = {}
+        text = ''
+        for level, zoom in enumerate(self.roi_zooms):
+            missing = set(self._missing_fields(text)) if level else None
+            for i, (page, kind, rect) in enumerate(regions):
+                if missing is not None and not REGION_FIELDS[kind] & missing:
+                    continue
+                region_texts[i] = self._ocr_page(page, zoom, clip=rect)
+                text = ''.join(region_texts[j] for j in sorted(region_texts))
+                if not self._missing_fields(text):
+                    return text
+        return text
+
+    def _missing_fields(self, text):
+        """Names of the wanted fields the extractors cannot find in the text"""
+        fields = scan_aadhar_text(text)
+        return [field for field in self.wanted_fields if not fields[field]]
+
+    def extract_aadhar_data(self, pdf_path, pdf_bytes=None):
         """Extract all aadhar fields from PDF"""
         try:
-            raw_text = self.process_pdf(pdf_path)
-            if not raw_text or len(raw_text.strip()) < 10:
+            raw_text = self.process_pdf(pdf_path, pdf_bytes)
+            if not self.qr_data and (not raw_text or len(raw_text.strip()) < 10):
                 return {'status': 'error', 'message': 'Could not extract text from PDF'}
             
             self.extracted_data['raw_text'] = raw_text
-            self.extracted_data['aadhar_number'] = self.extract_aadhar_number(raw_text)
-            self.extracted_data['dob'] = self.extract_dob(raw_text)
-            self.extracted_data['name'] = self.extract_name(raw_text)
-            self.extracted_data['gender'] = self.extract_gender(raw_text)
-            self.extracted_data['address'] = self.extract_address(raw_text)
+            if self.qr_data:
+                for field in FIELDS:
+                    self.extracted_data[field] = self.qr_data.get(field)
+            scanned = scan_aadhar_text(raw_text)
+            for field in self.wanted_fields:
+                self.extracted_data[field] = scanned[field]
+
+            # The secure QR code carries the last four digits of the number
+            last_four = (self.qr_data or {}).get('last_four_digits')
+            number = self.extracted_data['aadhar_number']
+            if last_four and number and not number.endswith(last_four):
+                print("Aadhar number does not match the QR code reference, discarding it")
+                self.extracted_data['aadhar_number'] = None
             
             # Remove raw_text from output data
             output_data = {k: v for k, v in self.extracted_data.items() if k != 'raw_text'}
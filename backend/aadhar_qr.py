@@ -0,0 +1,161 @@
+import re
+import zlib
+import xml.etree.ElementTree as ET
+from ocr_engine import pixmap_to_array
+
+# Field order of the UIDAI secure QR payload, after the optional version marker
+SECURE_QR_FIELDS = [
+    'email_mobile_indicator', 'reference_id', 'name', 'dob', 'gender',
+    'care_of', 'district', 'landmark', 'house', 'location', 'pincode',
+    'post_office', 'state', 'street', 'sub_district', 'vtc'
+]
+
+# Address parts in the order they are printed on the card
+ADDRESS_FIELDS = ['care_of', 'house', 'street', 'landmark', 'location', 'vtc',
+                  'post_office', 'sub_district', 'district', 'state', 'pincode']
+
+# Attribute names used by the older XML QR code
+XML_ADDRESS_FIELDS = {
+    'co': 'care_of', 'house': 'house', 'street': 'street', 'lm': 'landmark',
+    'loc': 'location', 'vtc': 'vtc', 'po': 'post_office', 'subdist': 'sub_district',
+    'dist': 'district', 'state': 'state', 'pc': 'pincode'
+}
+
+GENDERS = {'M': 'Male', 'F': 'Female', 'T': 'Transgender'}
+
+def _format_dob(value):
+    """Normalise a QR date of birth to dd/mm/yyyy, the format the OCR extractor returns"""
+    value = (value or '').strip()
+    match = re.match(r'^(\d{2})[\/\-](\d{2})[\/\-](\d{4})$', value)
+    if match:
+        return f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
+    match = re.match(r'^(\d{4})[\/\-](\d{2})[\/\-](\d{2})$', value)
+    if match:
+        return f"{match.group(3)}/{match.group(2)}/{match.group(1)}"
+    return None
+
+def _format_address(parts):
+    values = [parts.get(field, '').strip() for field in ADDRESS_FIELDS]
+    return ', '.join(value for value in values if value) or None
+
+def _format_number(value):
+    digits = re.sub(r'\D', '', value or '')
+    if len(digits) != 12:
+        return None
+    return f"{digits[:4]} {digits[4:8]} {digits[8:]}"
+
+def _decimal_to_int(digits, chunk=1000):
+    """Parse a long decimal string in chunks, staying under Python's int string conversion limit"""
+    number = 0
+    for start in range(0, len(digits), chunk):
+        part = digits[start:start + chunk]
+        number = number * 10 ** len(part) + int(part)
+    return number
+
+def decode_secure_qr(payload):
+    """Decode a secure QR payload: a big decimal integer wrapping a gzip-compressed, 0xFF-separated record
+
+    The full Aadhar number is not part of the secure QR; only its last four digits
+    lead the reference ID. The signature is not verified.
+    """
+    # Real payloads carry a photo and signature and run well past 4300 digits
+    number = _decimal_to_int(payload)
+    compressed = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    # wbits 47 accepts both gzip and zlib headers; trailing bytes are ignored
+    data = zlib.decompressobj(wbits=47).decompress(compressed)
+
+    parts = data.split(b'\xff', len(SECURE_QR_FIELDS) + 1)
+    if parts and parts[0].decode('ISO-8859-1').startswith('V'):
+        parts = parts[1:]
+    if len(parts) < len(SECURE_QR_FIELDS):
+        return None
+    fields = {name: parts[i].decode('ISO-8859-1') for i, name in enumerate(SECURE_QR_FIELDS)}
+
+    return {
+        'aadhar_number': None,
+        'name': fields['name'].strip() or None,
+        'dob': _format_dob(fields['dob']),
+        'gender': GENDERS.get(fields['gender'].strip().upper()[:1]),
+        'address': _format_address(fields),
+        'last_four_digits': fields['reference_id'][:4]
+    }
+
+def decode_xml_qr(payload):
+    """Decode the older XML QR code (PrintLetterBarcodeData), which also carries the number"""
+    root = ET.fromstring(payload[payload.index('<'):])
+    if root.tag != 'PrintLetterBarcodeData':
+        root = root.find('.//PrintLetterBarcodeData')
+        if root is None:
+            return None
+    attributes = root.attrib
+    address = {field: attributes.get(attribute, '') for attribute, field in XML_ADDRESS_FIELDS.items()}
+    return {
+        'aadhar_number': _format_number(attributes.get('uid')),
+        'name': attributes.get('name', '').strip() or None,
+        'dob': _format_dob(attributes.get('dob')),
+        'gender': GENDERS.get(attributes.get('gender', '').strip().upper()[:1]),
+        'address': _format_address(address)
+    }
+
+def decode_qr_payload(payload):
+    """Decode the text of an Aadhar QR code into extractor fields, or None if it is not one"""
+    payload = (payload or '').strip()
+    try:
+        if payload.isdigit():
+            return decode_secure_qr(payload)
+        if '<' in payload:
+            return decode_xml_qr(payload)
+    except (ValueError, zlib.error, ET.ParseError) as e:
+        print(f"Aadhar QR decode error: {e}")
+    return None
+
+class AadharQRReader:
+    """Find and decode the Aadhar QR code on rendered PDF pages with OpenCV
+
+    Each page is scanned at a low zoom; if a code is found but cannot be decoded,
+    only its neighbourhood is re-rendered at a higher zoom, since secure QR codes
+    are too dense to read from a low-resolution render.
+    """
+
+    def __init__(self, locate_zoom=2, decode_zoom=6):
+        import cv2
+        self.cv2 = cv2
+        self.detector = cv2.QRCodeDetector()
+        self.locate_zoom = locate_zoom
+        self.decode_zoom = decode_zoom
+
+    def _scan(self, pix):
+        import numpy as np
+        image = np.ascontiguousarray(pixmap_to_array(pix))
+        try:
+            payload, points, _ = self.detector.detectAndDecode(image)
+        except self.cv2.error:
+            return None, None
+        return payload, points
+
+    def read_page(self, page):
+        """Return the QR payload text on a page, or None"""
+        import fitz
+        zoom = self.locate_zoom
+        payload, points = self._scan(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)))
+        if payload:
+            return payload
+        if points is None:
+            return None
+
+        xs = points[..., 0].ravel() / zoom
+        ys = points[..., 1].ravel() / zoom
+        margin = 0.25 * max(xs.max() - xs.min(), ys.max() - ys.min())
+        clip = fitz.Rect(xs.min() - margin, ys.min() - margin, xs.max() + margin, ys.max() + margin) & page.rect
+        if clip.is_empty:
+            return None
+        payload, _ = self._scan(page.get_pixmap(matrix=fitz.Matrix(self.decode_zoom, self.decode_zoom), clip=clip))
+        return payload or None
+
+    def read_document(self, doc):
+        """Decoded fields from the first Aadhar QR code in the document, or None"""
+        for page in doc:
+            fields = decode_qr_payload(self.read_page(page))
+            if fields:
+                return fields
+        return None
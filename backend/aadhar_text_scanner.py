@@ -0,0 +1,153 @@
+import re
+from collections import deque
+
+# Precompiled patterns of the original per-field extractors (tests/aadhar_text_reference.py)
+NUMBER_PATTERNS = [
+    re.compile(r'\b(\d{4})\s+(\d{4})\s+(\d{4})\b'),
+    re.compile(r'\b(\d{4})-(\d{4})-(\d{4})\b'),
+    re.compile(r'\b(\d{12})\b')
+]
+DOB_PATTERNS = [
+    re.compile(r'DOB[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', re.IGNORECASE),
+    re.compile(r'Birth[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', re.IGNORECASE),
+    re.compile(r'\b(\d{2})[\/\-](\d{2})[\/\-](19|20\d{2})\b', re.IGNORECASE)
+]
+DATE_LINE = re.compile(r'\d{2}[\/\-]\d{2}[\/\-]\d{4}')
+NAME_LINE = re.compile(r'^[A-Za-z\s.]{3,50}$')
+DEVANAGARI = re.compile(r'[\u0900-\u097F]+')
+NON_ENGLISH = re.compile(r'[^A-Za-z0-9\s,./-]+')
+ADDRESS_LABEL = re.compile(r'\bADDRESS\b')
+PIN_CODE = re.compile(r'\b\d{6}\b')
+NUMBER_LINE = re.compile(r'\d{4}\s?\d{4}\s?\d{4}')
+ADDRESS_WORDS = re.compile(r'\b(ROAD|STREET|LANE|COLONY|NAGAR|GANJ|PUR)\b')
+
+# Substring markers, matched against upper-cased lines
+ADDRESS_MARKERS = re.compile(r'S/O|C/O|D/O|W/O|DIST|STATE|VILLAGE|CITY|TOWN|,')
+HEADER_MARKERS = re.compile(r'GOVERNMENT|UIDAI|UNIQUE|ISSUED')
+FOOTER_MARKERS = re.compile(r'ENROLLMENT|DOWNLOAD|HELP')
+FALLBACK_EXCLUDED = re.compile(r'GOVERNMENT|UIDAI')
+
+def clean_text_line(line):
+    """Clean unwanted characters and Hindi text"""
+    if not line.isascii():
+        line = DEVANAGARI.sub('', line)
+    line = NON_ENGLISH.sub(' ', line)
+    return ' '.join(line.split()).strip()
+
+def format_number(text):
+    """First valid 12-digit Aadhar number in the text, as "XXXX XXXX XXXX" """
+    for pattern in NUMBER_PATTERNS:
+        for match in pattern.finditer(text):
+            num = ''.join(match.groups())
+            if len(num) == 12 and num.isdigit() and num[0] not in ['0', '1']:
+                return f"{num[:4]} {num[4:8]} {num[8:]}"
+    return None
+
+def format_dob(text):
+    for pattern in DOB_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
+    return None
+
+def _is_address_line(line, line_upper):
+    return bool(
+        len(line) > 10
+        or ADDRESS_MARKERS.search(line_upper)
+        or PIN_CODE.search(line)
+        or ADDRESS_WORDS.search(line_upper)
+    )
+
+def _is_fallback_address_line(line):
+    return len(line) > 5 and not NUMBER_LINE.search(line) and not FALLBACK_EXCLUDED.search(line.upper())
+
+def scan_aadhar_text(text):
+    """Extract every Aadhar field from OCR or text-layer output in one pass over its lines
+
+    Each line is stripped, cleaned and upper-cased once and fed through a small
+    state machine that tracks the name look-back window, the "Address" block and
+    the PIN-code fallback block together. The number and DOB patterns may span
+    OCR line breaks, so they are matched once against the whole text with the
+    precompiled patterns. Results match the original per-field extractors kept in
+    tests/aadhar_text_reference.py.
+    """
+    name = None
+    gender_female = False
+    gender_male = False
+
+    # Last three cleaned lines, for the name look-back and the PIN fallback block
+    window = deque(maxlen=3)
+
+    # "Address" keyword block: None before the keyword, 'open' inside it, 'closed' after
+    address_state = None
+    address_lines = []
+
+    # PIN-code fallback: the first block around a PIN line with usable lines
+    fallback_lines = None
+    pending_fallback = None
+
+    for raw in text.split('\n'):
+        raw = raw.strip()
+        if not raw:
+            continue
+        line = clean_text_line(raw)
+        line_upper = line.upper()
+        raw_upper = raw.upper()
+
+        if not gender_female and 'MALE' in raw_upper:
+            if 'FEMALE' in raw_upper:
+                gender_female = True
+            else:
+                gender_male = True
+
+        # Name: the first clean, alphabetic line within three lines above a DOB line
+        if name is None and ('DOB' in raw_upper or DATE_LINE.search(raw)):
+            for prev in reversed(window):
+                if NAME_LINE.match(prev):
+                    name = prev.strip()
+                    break
+
+        # Address block after the "Address" keyword
+        if address_state != 'closed':
+            if ADDRESS_LABEL.search(line_upper) and len(line) < 30:
+                address_state = 'open'
+                if ':' in line:
+                    after_colon = line.split(':', 1)[1].strip()
+                    if len(after_colon) > 3:
+                        address_lines.append(after_colon)
+            elif address_state == 'open' and len(line) >= 3 and not NUMBER_LINE.search(line) \
+                    and not HEADER_MARKERS.search(line_upper):
+                if _is_address_line(line, line_upper):
+                    address_lines.append(line)
+                if len(address_lines) >= 5 or FOOTER_MARKERS.search(line_upper):
+                    address_state = 'closed'
+
+        # PIN fallback block: up to three lines before a PIN line and one after,
+        # only needed while the "Address" block has produced nothing
+        if fallback_lines is None and not address_lines:
+            if pending_fallback is not None:
+                if _is_fallback_address_line(line):
+                    pending_fallback.append(line)
+                if pending_fallback:
+                    fallback_lines = pending_fallback
+                pending_fallback = None
+            if fallback_lines is None and PIN_CODE.search(line):
+                pending_fallback = [l for l in list(window) + [line] if _is_fallback_address_line(l)]
+
+        window.append(line)
+
+    if fallback_lines is None and pending_fallback:
+        fallback_lines = pending_fallback
+
+    if address_lines or fallback_lines:
+        address = ', '.join(dict.fromkeys(address_lines or fallback_lines))
+    else:
+        address = None
+
+    return {
+        'aadhar_number': format_number(text),
+        'name': name,
+        'dob': format_dob(text),
+        'gender': 'Female' if gender_female else 'Male' if gender_male else None,
+        'address': address
+    }
@@ -0,0 +1,159 @@
+import os
+import re
+from dotenv import load_dotenv
+from pin_directory import PIN_PREFIX_STATES, get_pin_directory
+
+load_dotenv()
+
+# Keywords from the Aadhar address extractor, grouped by the component they mark
+RELATION = re.compile(r'^\s*(?:S|C|D|W)\s*[/I1l]\s*O\b[\s:.]*', re.IGNORECASE)
+HOUSE_MARKER = re.compile(r'\b(?:H\.?\s*NO|(?:HOUSE|FLAT|DOOR|PLOT|QTR)(?:\s*NO)?)\b\.?[\s:]*(?=#?\s*[A-Z]{0,2}\s?-?\s?\d)', re.IGNORECASE)
+HOUSE_NUMBER = re.compile(r'^#?\s*([A-Z]{0,2}\s?-?\s?\d+[A-Z]?(?:\s?[/-]\s?\d+[A-Z]?)?)\b', re.IGNORECASE)
+PREMISES_WORDS = re.compile(
+    r'\b(NAGAR|COLONY|VIHAR|ENCLAVE|APARTMENTS?|APTS?|SOCIETY|RESIDENCY|COMPLEX|TOWERS?|BLOCK|'
+    r'SECTOR|PHASE|VILLAGE|VILL|GRAM|PURAM|PUR|GANJ|ABAD|BAGH|KUNJ|NIWAS|BHAWAN|HOUSING)\b', re.IGNORECASE)
+ROAD_WORDS = re.compile(r'\b(ROAD|RD|STREET|ST|MARG|LANE|GALI|PATH|CROSS|MAIN|HIGHWAY|PO|POST)\b', re.IGNORECASE)
+AREA_WORDS = re.compile(r'\b(AREA|LOCALITY|MOHALLA|WARD|EXTENSION|EXTN|NEAR|OPP|BEHIND|TEHSIL|TALUK|MANDAL)\b', re.IGNORECASE)
+DISTRICT_PREFIX = re.compile(r'^(?:DIST|DISTRICT)\b\.?[\s:-]*', re.IGNORECASE)
+PIN_CODE = re.compile(r'\b(\d{6})\b')
+NOISE = re.compile(r'^[\s\-:.,]+|[\s\-:.,]+$')
+
+STATES = {state.casefold() for state in PIN_PREFIX_STATES.values() if state} | {
+    'chandigarh', 'puducherry', 'dadra and nagar haveli', 'daman and diu',
+    'dadra and nagar haveli and daman and diu', 'lakshadweep', 'nct of delhi', 'new delhi'
+}
+
+# Weight of each component in the confidence score
+WEIGHTS = {
+    'location': 0.25,
+    'flat_door_block_no': 0.2,
+    'premises_building_village': 0.2,
+    'road_street_post_office': 0.15,
+    'area_locality': 0.1,
+    'clean': 0.1
+}
+
+def confidence_threshold():
+    return float(os.getenv('ADDRESS_RULES_THRESHOLD', '0.8'))
+
+def _segments(address):
+    parts = re.split(r'[,\n;]+', address)
+    return [NOISE.sub('', part) for part in parts if NOISE.sub('', part)]
+
+def parse_address_rules(address):
+    """Split an Indian address into the seven form components without the LLM
+
+    Returns (components, confidence). The PIN code gives the district and state,
+    a relation prefix (S/O, C/O, D/O, W/O and their OCR misreads) and the name after
+    it are dropped, a leading house number becomes flat_door_block_no, and the
+    remaining comma-separated segments are classified by keyword. Confidence is
+    the weight of the components found, less a penalty for segments that are
+    ambiguous or left over. When the city is only a guess from an unclassified
+    segment, confidence is capped below the threshold so Groq gets the address.
+    """
+    components = {
+        "flat_door_block_no": "",
+        "premises_building_village": "",
+        "road_street_post_office": "",
+        "area_locality": "",
+        "town_city_district": "",
+        "state": "",
+        "pin_code": ""
+    }
+    address = address or ''
+    score = 0.0
+
+    match = PIN_CODE.search(address)
+    location = None
+    if match:
+        components['pin_code'] = match.group(1)
+        address = address[:match.start()] + address[match.end():]
+        location = get_pin_directory().lookup(components['pin_code'])
+    if location:
+        components['state'] = location['state']
+        components['town_city_district'] = location['district']
+
+    known_places = {components['state'].casefold(), components['town_city_district'].casefold()} - {''}
+    city_guessed = False
+    leftovers = []
+    ambiguous = 0
+    for index, segment in enumerate(_segments(address)):
+        if index == 0 and RELATION.match(segment):
+            # Drop the relation and the name after it, keeping any house number that follows
+            segment = RELATION.sub('', segment)
+            marker = HOUSE_MARKER.search(segment)
+            digit = re.search(r'\d', segment)
+            if marker:
+                segment = segment[marker.start():]
+            elif digit:
+                segment = segment[digit.start():]
+            else:
+                continue
+
+        folded = segment.casefold()
+        if folded in known_places or folded in STATES:
+            if not components['state'] and folded in STATES:
+                components['state'] = segment.title()
+            continue
+        # "Saboli North East Delhi": keep the locality, drop the district the PIN index
+        # gave. State names are never stripped, since they are part of district names
+        # such as "North East Delhi"
+        district_name = components['town_city_district'].casefold() if location and location['district'] else ''
+        if district_name and folded.endswith(' ' + district_name):
+            segment = segment[:-len(district_name)].strip()
+
+        district = DISTRICT_PREFIX.match(segment)
+        if district:
+            if not components['town_city_district']:
+                components['town_city_district'] = segment[district.end():]
+            continue
+
+        segment = HOUSE_MARKER.sub('', segment).strip()
+        number = HOUSE_NUMBER.match(segment)
+        if number and not components['flat_door_block_no']:
+            components['flat_door_block_no'] = re.sub(r'\s+', '', number.group(1))
+            segment = NOISE.sub('', segment[number.end():])
+            if not segment:
+                continue
+
+        patterns = [('premises_building_village', PREMISES_WORDS),
+                    ('road_street_post_office', ROAD_WORDS),
+                    ('area_locality', AREA_WORDS)]
+        kinds = [key for key, pattern in patterns if pattern.search(segment)]
+        if kinds and len(segment.split()) == 1 and not NOISE.sub('', PREMISES_WORDS.sub('', ROAD_WORDS.sub('', AREA_WORDS.sub('', segment)))):
+            # A bare keyword such as "Street" left over from a broken OCR line
+            ambiguous += 1
+            continue
+        if len(kinds) > 1:
+            ambiguous += 1
+        kind = next((key for key in kinds if not components[key]), None)
+        if kind:
+            components[kind] = segment
+        else:
+            leftovers.append(segment)
+
+    # Unclassified segments: the last one is the city when the PIN gave no district,
+    # the first is the locality
+    if leftovers and not components['town_city_district']:
+        components['town_city_district'] = leftovers.pop()
+        city_guessed = True
+    if leftovers and not components['area_locality']:
+        components['area_locality'] = leftovers.pop(0)
+
+    if location and location['district']:
+        score += WEIGHTS['location']
+    elif components['state'] and components['town_city_district']:
+        score += 0.6 * WEIGHTS['location']
+    elif components['state']:
+        score += 0.2 * WEIGHTS['location']
+    for key in ['flat_door_block_no', 'premises_building_village', 'road_street_post_office', 'area_locality']:
+        if components[key]:
+            score += WEIGHTS[key]
+    if not leftovers and not ambiguous:
+        score += WEIGHTS['clean']
+    score -= 0.05 * (len(leftovers) + ambiguous)
+
+    if city_guessed:
+        score = min(score, confidence_threshold() - 0.01)
+
+    return components, round(max(score, 0.0), 3)
@@ -0,0 +1,62 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_clients = {}
+_session = None
+_lock = threading.Lock()
+
+def _client_config():
+    """Connection pool, keep-alive and retry settings shared by all clients"""
+    return Config(
+        max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '20')),
+        tcp_keepalive=True,
+        connect_timeout=float(os.getenv('AWS_CONNECT_TIMEOUT', '5')),
+        read_timeout=float(os.getenv('AWS_READ_TIMEOUT', '60')),
+        retries={
+            'mode': 'adaptive',
+            'total_max_attempts': int(os.getenv('AWS_MAX_ATTEMPTS', '5'))
+        }
+    )
+
+def create_client(service):
+    """Build a new client the way the extractors used to, one per instance"""
+    return boto3.client(
+        service,
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION')
+    )
+
+def get_client(service):
+    """Process-wide pooled client for an AWS service
+
+    boto3 sessions are not thread-safe but the clients they create are, so clients
+    are built once under a lock and then shared by every request thread.
+    """
+    global _session
+    client = _clients.get(service)
+    if client is not None:
+        return client
+
+    with _lock:
+        if service not in _clients:
+            if _session is None:
+                _session = boto3.session.Session(
+                    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                    region_name=os.getenv('AWS_REGION')
+                )
+            _clients[service] = _session.client(service, config=_client_config())
+        return _clients[service]
+
+def reset_clients():
+    """Drop cached clients, e.g. after credentials are rotated"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Latency benchmarks for the TaxES backend
+Usage: python benchmark.py <benchmark> [runs]
+"""
+
+import os
+import sys
+import time
+import statistics
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def time_calls(func, runs):
+    """Run func repeatedly and return per-call latencies in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    """Print median, p95 and mean latency for a set of timings"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<40} median {statistics.median(ordered):9.2f} ms   "
+          f"p95 {p95:9.2f} ms   mean {statistics.mean(ordered):9.2f} ms   (n={len(ordered)})")
+
+def bench_aws_clients(runs=20):
+    """S3 request latency with a fresh client per request vs the shared pooled client"""
+    from aws_clients import create_client, get_client
+    bucket_name = os.getenv('S3_BUCKET_NAME')
+    if not bucket_name:
+        print("S3_BUCKET_NAME not configured")
+        return
+
+    def fresh_client_request():
+        create_client('s3').head_bucket(Bucket=bucket_name)
+
+    def pooled_client_request():
+        get_client('s3').head_bucket(Bucket=bucket_name)
+
+    # Warm the pooled client so only steady-state requests are measured
+    pooled_client_request()
+    report("fresh client per request", time_calls(fresh_client_request, runs))
+    report("pooled client", time_calls(pooled_client_request, runs))
+
+SAMPLE_AADHAR_PDF = os.getenv('BENCHMARK_AADHAR_PDF', 'Aadhar.pdf')
+
+def render_pages(pdf_path, zoom=3):
+    """Render every page of a PDF to PNG bytes"""
+    import fitz
+    with fitz.open(pdf_path) as doc:
+        return [page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png") for page in doc]
+
+def bench_ocr_warmup(runs=20):
+    """First-request OCR latency with a cold reader vs requests served by the warm shared reader"""
+    from ocr_engine import OCRReaderRegistry, get_ocr_registry
+    page = render_pages(SAMPLE_AADHAR_PDF)[0]
+
+    def cold_request():
+        OCRReaderRegistry().readtext(page, detail=0)
+
+    def warm_request():
+        get_ocr_registry().readtext(page, detail=0)
+
+    # Model loads dominate cold runs, so a few are enough
+    report("cold reader (load + OCR)", time_calls(cold_request, min(runs, 3)))
+    get_ocr_registry().preload()
+    report("warm shared reader", time_calls(warm_request, runs))
+
+def bench_ocr_image_handoff(runs=20):
+    """Per-page cost of handing a rendered page to OCR via temp PNG file vs in-memory array"""
+    import io
+    import fitz
+    from PIL import Image
+    from ocr_engine import get_ocr_registry, pixmap_to_array
+
+    with fitz.open(SAMPLE_AADHAR_PDF) as doc:
+        pixmaps = [page.get_pixmap(matrix=fitz.Matrix(3, 3)) for page in doc]
+
+    def via_temp_png(pix, ocr=False):
+        img = Image.open(io.BytesIO(pix.tobytes("png")))
+        temp = "temp_benchmark.png"
+        img.save(temp)
+        if ocr:
+            get_ocr_registry().readtext(temp, detail=0)
+        os.remove(temp)
+
+    def via_array(pix, ocr=False):
+        image = pixmap_to_array(pix)
+        if ocr:
+            get_ocr_registry().readtext(image, detail=0)
+
+    for i, pix in enumerate(pixmaps):
+        report(f"page {i + 1} handoff: temp PNG", time_calls(lambda: via_temp_png(pix), runs))
+        report(f"page {i + 1} handoff: array", time_calls(lambda: via_array(pix), runs))
+
+    if get_ocr_registry().preload():
+        for i, pix in enumerate(pixmaps):
+            report(f"page {i + 1} OCR: temp PNG", time_calls(lambda: via_temp_png(pix, ocr=True), runs))
+            report(f"page {i + 1} OCR: array", time_calls(lambda: via_array(pix, ocr=True), runs))
+
+def bench_ocr_throughput(runs=20):
+    """Pages per second under concurrent load: shared in-process reader, OCR worker pool and micro-batcher"""
+    from concurrent.futures import ThreadPoolExecutor
+    import fitz
+    import ocr_engine
+
+    with fitz.open(SAMPLE_AADHAR_PDF) as doc:
+        pages = [ocr_engine.pixmap_to_array(page.get_pixmap(matrix=fitz.Matrix(3, 3))) for page in doc]
+    clients = int(os.getenv('BENCHMARK_CLIENTS', str(os.cpu_count() or 1)))
+
+    def ocr_page(i):
+        ocr_engine.readtext(pages[i % len(pages)], detail=0)
+
+    # Repeated pages would otherwise be served from the OCR result cache
+    os.environ['OCR_CACHE_ENABLED'] = 'false'
+    for backend in ['thread', 'process', 'batch']:
+        os.environ['OCR_BACKEND'] = backend
+        if not ocr_engine.start_ocr_backend():
+            print(f"{backend} backend unavailable, skipping")
+            continue
+        ocr_page(0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(ocr_page, range(runs)))
+        elapsed = time.perf_counter() - start
+        print(f"{backend:<10} {runs / elapsed:8.2f} pages/s   ({runs} pages, {clients} concurrent clients)")
+
+def bench_ocr_profiles(runs=20):
+    """Per-page OCR latency and accuracy for each CPU inference profile
+
+    Accuracy is the text similarity to the full-precision "accuracy" profile and
+    the Aadhar fields the extractor finds in each profile's output.
+    """
+    import difflib
+    import fitz
+    from aadhar_text_scanner import scan_aadhar_text
+    from ocr_engine import OCR_PROFILES, OCRReaderRegistry, get_inference_profile, pixmap_to_array
+
+    with fitz.open(SAMPLE_AADHAR_PDF) as doc:
+        pages = [pixmap_to_array(page.get_pixmap(matrix=fitz.Matrix(3, 3))) for page in doc]
+
+    reference = None
+    for name in ['accuracy'] + [name for name in OCR_PROFILES if name != 'accuracy']:
+        registry = OCRReaderRegistry(get_inference_profile(name))
+        if not registry.preload():
+            print("EasyOCR unavailable")
+            return
+        texts = []
+
+        def ocr_document():
+            texts.append("\n".join("\n".join(registry.readtext(page, detail=0)) for page in pages))
+
+        report(f"{name} profile ({len(pages)} pages)", time_calls(ocr_document, runs))
+        text = texts[-1]
+        if reference is None:
+            reference = text
+        similarity = difflib.SequenceMatcher(None, reference, text).ratio()
+        found = [field for field, value in scan_aadhar_text(text).items() if value]
+        print(f"{'':<40} similarity to full precision {similarity:.3f}, fields found: {', '.join(found)}")
+
+def bench_ocr_cache(runs=20):
+    """Per-page OCR latency on a cache miss vs a repeat upload served from the OCR result cache"""
+    import fitz
+    import ocr_engine
+    if not ocr_engine.start_ocr_backend():
+        print("OCR backend unavailable")
+        return
+    cache = ocr_engine.get_result_cache()
+
+    def render_and_ocr(clear):
+        if clear:
+            cache.clear()
+        with fitz.open(SAMPLE_AADHAR_PDF) as doc:
+            for page in doc:
+                ocr_engine.readtext(ocr_engine.pixmap_to_array(page.get_pixmap(matrix=fitz.Matrix(3, 3))), detail=0)
+
+    report("cache miss (render + OCR)", time_calls(lambda: render_and_ocr(True), min(runs, 5)))
+    report("cache hit (render + hash)", time_calls(lambda: render_and_ocr(False), runs))
+    print(f"{'':<40} {cache.get_stats()}")
+
+def bench_aadhar_ocr_modes(runs=20):
+    """Aadhar extraction latency and OCR'd pixels for full-page vs region-of-interest OCR
+
+    Set AADHAR_OCR_ZOOMS / AADHAR_ROI_ZOOMS to a single zoom (e.g. "3") to compare
+    against OCR without the adaptive zoom ladder.
+    """
+    from aadhar_extractor_local import AadharExtractorLocal
+    import ocr_engine
+    if not ocr_engine.start_ocr_backend():
+        print("OCR backend unavailable")
+        return
+
+    for mode in ['full', 'roi']:
+        os.environ['AADHAR_OCR_MODE'] = mode
+        extractors = []
+
+        def extract():
+            extractor = AadharExtractorLocal()
+            extractor.extract_aadhar_data(SAMPLE_AADHAR_PDF)
+            extractors.append(extractor)
+
+        report(f"{mode} OCR", time_calls(extract, runs))
+        last = extractors[-1]
+        found = [field for field, value in last.extracted_data.items() if field != 'raw_text' and value]
+        print(f"{'':<40} {last.ocr_pixels / 1e6:.1f} Mpx OCR'd per document, fields found: {', '.join(found)}")
+
+def bench_aadhar_qr(runs=20):
+    """Per-document latency of finding and decoding the Aadhar QR code"""
+    import fitz
+    from aadhar_qr import AadharQRReader
+    reader = AadharQRReader()
+    results = []
+
+    def read_qr():
+        with fitz.open(SAMPLE_AADHAR_PDF) as doc:
+            results.append(reader.read_document(doc))
+
+    report("QR locate + decode", time_calls(read_qr, runs))
+    print(f"{'':<40} QR code {'decoded' if results[-1] else 'not found'}")
+
+SAMPLE_AADHAR_TEXT = """Government of India
+Test Person
+DOB : 18/09/1999
+FEMALE
+2345 6789 0123
+VID : 9111 8122 7978 3936
+Address:
+D/O Someone H. No. E - 376 Street
+No. 15 Ashok Nagar Shahdara
+North East Delhi - 110093
+2345 6789 0123
+help@uidai.gov.in"""
+
+def bench_aadhar_text_scan(runs=20):
+    """Field extraction over a batch of OCR texts: the original per-field extractors vs the single-pass scanner"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests'))
+    from aadhar_text_reference import extract_fields
+    from aadhar_text_scanner import scan_aadhar_text
+    batch_size = int(os.getenv('BENCHMARK_BATCH_SIZE', '1000'))
+    texts = [SAMPLE_AADHAR_TEXT.replace('2345 6789', f"{2345 + i % 7000} 6789") for i in range(batch_size)]
+
+    report(f"per-field extractors ({batch_size} texts)", time_calls(lambda: [extract_fields(t) for t in texts], runs))
+    report(f"single-pass scanner ({batch_size} texts)", time_calls(lambda: [scan_aadhar_text(t) for t in texts], runs))
+    mismatches = sum(extract_fields(text) != scan_aadhar_text(text) for text in texts)
+    print(f"{'':<40} {mismatches} texts with different results")
+
+def bench_groq_load(runs=200):
+    """Name parses under concurrent load against the local Groq stub
+
+    Compares a new connection per call with the pooled session on a healthy mock,
+    then runs the pooled client against a stub that fails and hangs some calls.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import requests
+    import groq_parser
+    from groq_stub_server import start_stub_server
+    clients = int(os.getenv('BENCHMARK_CLIENTS', '8'))
+    # Every parse must reach the endpoint
+    os.environ['PARSE_CACHE_ENABLED'] = 'false'
+
+    def load(parser, label):
+        def parse(_):
+            start = time.perf_counter()
+            parser.parse_name("Test Person")
+            return (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            timings = list(executor.map(parse, range(runs)))
+        report(label, timings)
+        print(f"{'':<40} {runs / (time.perf_counter() - start):.1f} parses/s with {clients} clients")
+
+    server, url = start_stub_server(latency_ms=50)
+    parser = groq_parser.GroqParser()
+    parser.base_url = url
+
+    class UnpooledParser(groq_parser.GroqParser):
+        def _call_groq_api(self, prompt):
+            response = requests.post(self.base_url, json={"messages": [{"role": "user", "content": prompt}]})
+            response.raise_for_status()
+            return response.json()['choices'][0]['message']['content'].strip()
+
+    unpooled = UnpooledParser()
+    unpooled.base_url = url
+    load(unpooled, "new connection per call")
+    load(parser, "pooled session")
+    server.shutdown()
+
+    server, url = start_stub_server(latency_ms=50, error_rate=0.1, hang_rate=0.02)
+    parser.base_url = url
+    before = groq_parser.get_groq_stats()
+    load(parser, "pooled, 10% errors + 2% hangs")
+    after = groq_parser.get_groq_stats()
+    print(f"{'':<40} " + ", ".join(f"{key} {after[key] - before[key]}" for key in after))
+    server.shutdown()
+
+def bench_groq_enrichment(runs=20):
+    """Aadhar name/address enrichment against the local Groq stub
+
+    Times one combined parse per session and bulk parses of the same sessions under a
+    seeded lognormal latency (GROQ_STUB_LATENCY_MS median, GROQ_STUB_LATENCY_SIGMA tail),
+    with the parse cache off and every address sent to the model.
+    """
+    import groq_parser
+    from groq_stub_server import start_stub_server
+    os.environ['PARSE_CACHE_ENABLED'] = 'false'
+    os.environ['ADDRESS_RULES_THRESHOLD'] = '2'
+    os.environ.setdefault('GROQ_BULK_RPM', '0')
+    sessions = [(f"Test Person {i}", address) for i, address in enumerate(SAMPLE_ADDRESSES * 4)]
+
+    server, url = start_stub_server(latency_distribution='lognormal', seed=42)
+    parser = groq_parser.GroqParser()
+    parser.base_url = url
+    report("combined parse (1 session)",
+           time_calls(lambda: parser.parse_name_and_address(*sessions[0]), runs))
+    report(f"combined parse ({len(sessions)} sessions)",
+           time_calls(lambda: [parser.parse_name_and_address(*session) for session in sessions], runs))
+
+    def bulk():
+        parser.parse_names_bulk([name for name, _ in sessions])
+        parser.parse_addresses_bulk([address for _, address in sessions])
+    report(f"bulk parse ({len(sessions)} sessions)", time_calls(bulk, runs))
+    print(f"{'':<40} {server.config.requests} stub requests")
+    server.shutdown()
+
+def bench_groq_resilience(runs=200):
+    """Name parses against a degraded Groq stub, with and without hedging and the breaker
+
+    A stub that stalls a few calls for a second compares plain calls with hedged ones, then a
+    stub that times out every call compares the full timeout per parse with the
+    circuit breaker short-circuiting to the fallback.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import groq_parser
+    from groq_stub_server import start_stub_server
+    clients = int(os.getenv('BENCHMARK_CLIENTS', '8'))
+    os.environ['PARSE_CACHE_ENABLED'] = 'false'
+
+    def load(parser, label, count):
+        def parse(_):
+            start = time.perf_counter()
+            parser.parse_name("Test Person")
+            return (time.perf_counter() - start) * 1000
+        before = groq_parser.get_groq_stats()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            report(label, list(executor.map(parse, range(count))))
+        after = groq_parser.get_groq_stats()
+        changed = {key: after[key] - before[key] for key in after if after[key] != before[key]}
+        print(f"{'':<40} " + ", ".join(f"{key} {value}" for key, value in changed.items()))
+
+    server, url = start_stub_server(latency_ms=30, latency_distribution='lognormal', hang_rate=0.03,
+                                    hang_seconds=1, seed=7)
+    os.environ['GROQ_BREAKER_ENABLED'] = 'false'
+    parser = groq_parser.GroqParser()
+    parser.base_url = url
+    load(parser, "3% stalled calls, no hedging", runs)
+    parser.hedge_enabled = True
+    load(parser, "3% stalled calls, hedged after p95", runs)
+    server.shutdown()
+
+    # Every call hangs past the read timeout
+    server, url = start_stub_server(latency_ms=0, hang_rate=1.0, hang_seconds=5)
+    os.environ['GROQ_READ_TIMEOUT'] = '1'
+    os.environ['GROQ_MAX_ATTEMPTS'] = '1'
+    parser = groq_parser.GroqParser()
+    parser.base_url = url
+    outage_runs = min(runs, 4 * clients)
+    load(parser, "outage, no breaker", outage_runs)
+    os.environ['GROQ_BREAKER_ENABLED'] = 'true'
+    load(parser, "outage, circuit breaker", outage_runs)
+    server.shutdown()
+
+def bench_excel_fill(runs=20):
+    """ITR workbook fills with the template parsed per fill (cold) and from the template cache (warm)
+
+    Uses a throwaway session with small parsed documents and a precomputed
+    enrichment, so no Groq call is made.
+    """
+    import json
+    import shutil
+    import uuid
+    from enrichment import save_enrichment
+    from excel_filler_local import ExcelFiller
+    from template_cache import get_template_cache
+
+    session_id = f"benchmark-{uuid.uuid4()}"
+    filler = ExcelFiller(session_id=session_id)
+    filler.parsed_dir.mkdir(parents=True, exist_ok=True)
+    aadhar = {"aadhar_number": "2345 6789 0123", "name": "Test Person", "dob": "01/01/1990",
+              "gender": "Male", "address": SAMPLE_ADDRESSES[0]}
+    documents = {
+        "form16_parsed.json": {"pan": "ABCDE1234F", "gross_salary": 900000, "standard_deduction_16_ia": 50000,
+                               "deduction_80C": 150000},
+        "aadhar_parsed.json": aadhar,
+        "passbook_parsed.json": {"account_number": "123456789012", "ifsc_code": "SBIN0000001"}
+    }
+    for name, data in documents.items():
+        with open(filler.parsed_dir / name, 'w') as f:
+            json.dump(data, f)
+    save_enrichment(filler.parsed_dir, aadhar, {"first_name": "Test", "middle_name": "", "last_name": "Person"},
+                    {"flat_door_block_no": "E-376", "town_city_district": "Delhi", "state": "Delhi", "pin_code": "110093"})
+
+    try:
+        os.environ['TEMPLATE_CACHE_ENABLED'] = 'false'
+        report("fill, template parsed per fill (cold)", time_calls(filler.fill_itr_excel, runs))
+        os.environ['TEMPLATE_CACHE_ENABLED'] = 'true'
+        filler.fill_itr_excel()
+        report("fill, template from cache (warm)", time_calls(filler.fill_itr_excel, runs))
+        print(f"{'':<40} {get_template_cache().get_stats()}")
+    finally:
+        shutil.rmtree(filler.base_dir, ignore_errors=True)
+
+SAMPLE_ADDRESSES = [
+    "D/O: Someone, E-376, Street No. 15, Ashok Nagar, Shahdara, North East Delhi, Delhi, 110093",
+    "D/O Someone H. No. E - 376 Street, No. 15 Ashok Nagar Shahdara, North East Delhi - 110093",
+    "DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093",
+    "S/O Raj Kumar, Flat No 12B, Green Park Apartments, MG Road, Near Temple, Bangalore, Karnataka, 560001",
+    "C/O Ram, 45/2, Rampur Village, PO Rampur, Dist Sitapur, Uttar Pradesh, 261001"
+]
+
+def bench_address_rules(runs=20):
+    """Share of addresses the rule-based parser resolves without Groq, and its latency
+
+    Uses BENCHMARK_ADDRESSES (one address per line) if set, else a few samples.
+    """
+    from address_parser import confidence_threshold, parse_address_rules
+    addresses = SAMPLE_ADDRESSES
+    if os.getenv('BENCHMARK_ADDRESSES'):
+        with open(os.getenv('BENCHMARK_ADDRESSES'), 'r') as f:
+            addresses = [line.strip() for line in f if line.strip()]
+
+    report(f"rule-based parse ({len(addresses)} addresses)",
+           time_calls(lambda: [parse_address_rules(address) for address in addresses], runs))
+    scores = [parse_address_rules(address)[1] for address in addresses]
+    confident = sum(score >= confidence_threshold() for score in scores)
+    print(f"{'':<40} {confident}/{len(addresses)} addresses skip Groq "
+          f"(threshold {confidence_threshold()}, median confidence {statistics.median(scores):.2f})")
+
+BENCHMARKS = {
+    'aws-clients': bench_aws_clients,
+    'ocr-warmup': bench_ocr_warmup,
+    'ocr-image-handoff': bench_ocr_image_handoff,
+    'ocr-throughput': bench_ocr_throughput,
+    'ocr-cache': bench_ocr_cache,
+    'ocr-profiles': bench_ocr_profiles,
+    'aadhar-ocr-modes': bench_aadhar_ocr_modes,
+    'aadhar-qr': bench_aadhar_qr,
+    'aadhar-text-scan': bench_aadhar_text_scan,
+    'groq-load': bench_groq_load,
+    'groq-enrichment': bench_groq_enrichment,
+    'groq-resilience': bench_groq_resilience,
+    'address-rules': bench_address_rules,
+    'excel-fill': bench_excel_fill
+}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: python benchmark.py <{'|'.join(BENCHMARKS)}> [runs]")
+        sys.exit(1)
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    BENCHMARKS[sys.argv[1]](runs)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Bulk Groq enrichment of stored sessions
+Usage: python bulk_enrich.py [--force] [sessions_dir]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from enrichment import load_enrichment, save_enrichment
+from groq_parser import GroqParser, get_groq_stats
+from session_janitor import SESSIONS_DIR
+
+def load_sessions(sessions_dir, force=False):
+    """(parsed_dir, aadhar_data) for every session still needing enrichment"""
+    sessions = []
+    for path in sorted(Path(sessions_dir).iterdir()):
+        aadhar_path = path / "parsed" / "aadhar_parsed.json"
+        if not aadhar_path.exists():
+            continue
+        try:
+            with open(aadhar_path, 'r') as f:
+                aadhar_data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path.name}: {e}")
+            continue
+        if force or load_enrichment(path / "parsed", aadhar_data) is None:
+            sessions.append((path / "parsed", aadhar_data))
+    return sessions
+
+def enrich_sessions(sessions, parser=None):
+    """Parse every session's Aadhar name and address with batched Groq requests"""
+    parser = parser or GroqParser()
+    names = parser.parse_names_bulk([aadhar_data.get('name') for _, aadhar_data in sessions])
+    addresses = parser.parse_addresses_bulk([aadhar_data.get('address') for _, aadhar_data in sessions])
+    for (parsed_dir, aadhar_data), parsed_name, parsed_address in zip(sessions, names, addresses):
+        save_enrichment(parsed_dir, aadhar_data, parsed_name, parsed_address)
+    return len(sessions)
+
+def main():
+    args = sys.argv[1:]
+    force = '--force' in args
+    args = [arg for arg in args if arg != '--force']
+    if len(args) > 1:
+        print(__doc__.strip())
+        sys.exit(1)
+    sessions_dir = args[0] if args else SESSIONS_DIR
+
+    sessions = load_sessions(sessions_dir, force)
+    print(f"Enriching {len(sessions)} sessions")
+    start = time.perf_counter()
+    enrich_sessions(sessions)
+    print(f"Done in {time.perf_counter() - start:.1f}s: {get_groq_stats()}")
+
+if __name__ == '__main__':
+    main()
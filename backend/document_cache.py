@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Stage name -> document type, used to pick the TTL for a cached artifact
+STAGE_DOCUMENT_TYPES = {
+    'form16_extractor': 'form16',
+    'form16_parser': 'form16',
+    'passbook_extractor': 'passbook',
+    'passbook_parser': 'passbook',
+    'aadhar_extractor': 'aadhar'
+}
+
+# Stage name -> modules whose code produces its outputs; editing any of them invalidates the stage's entries
+STAGE_SOURCES = {
+    'form16_extractor': ['form16_extractor_local.py'],
+    'form16_parser': ['form16_parser.py'],
+    'passbook_extractor': ['passbook_extractor_local.py'],
+    'passbook_parser': ['passbook_parser.py'],
+    'aadhar_extractor': ['aadhar_extractor_local.py', 'aadhar_text_scanner.py', 'aadhar_qr.py', 'ocr_engine.py']
+}
+
+# Stage name -> settings that change its outputs
+STAGE_SETTINGS = {
+    'aadhar_extractor': [
+        'AADHAR_OCR_MODE', 'AADHAR_OCR_ZOOMS', 'AADHAR_ROI_LOCATE_ZOOM', 'AADHAR_ROI_ZOOMS',
+        'AADHAR_QR_ENABLED', 'AADHAR_QR_LOCATE_ZOOM', 'AADHAR_QR_DECODE_ZOOM', 'OCR_PROFILE', 'OCR_QUANTIZE'
+    ]
+}
+
+# Stage name -> installed packages whose version changes its outputs
+STAGE_PACKAGES = {
+    'aadhar_extractor': ['easyocr', 'PyMuPDF']
+}
+
+# Default time-to-live per document type, in hours
+DEFAULT_TTL_HOURS = {
+    'form16': 24 * 7,
+    'passbook': 24,
+    'aadhar': 24 * 30
+}
+
+_source_digests = {}
+_package_versions = {}
+
+def _source_digest(filename):
+    """Content hash of a backend module, computed once per process"""
+    if filename not in _source_digests:
+        try:
+            with open(Path(__file__).parent / filename, 'rb') as f:
+                _source_digests[filename] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            _source_digests[filename] = '<missing>'
+    return _source_digests[filename]
+
+def _package_version(package):
+    if package not in _package_versions:
+        try:
+            _package_versions[package] = importlib_metadata.version(package)
+        except importlib_metadata.PackageNotFoundError:
+            _package_versions[package] = '<missing>'
+    return _package_versions[package]
+
+def stage_fingerprint(stage):
+    """Hash of the code, settings and package versions behind a stage's outputs"""
+    fingerprint = {
+        'sources': {name: _source_digest(name) for name in STAGE_SOURCES.get(stage, [])},
+        'settings': {name: os.getenv(name) for name in STAGE_SETTINGS.get(stage, [])},
+        'packages': {name: _package_version(name) for name in STAGE_PACKAGES.get(stage, [])}
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:16]
+
+class DocumentCache:
+    """Cross-session cache of stage outputs
+
+    Entries are keyed by the content hash of the stage inputs plus the stage
+    fingerprint, so outputs from older extractor code or settings are never served.
+    They are independent of sessions: deleting a session leaves its entries to
+    expire by TTL or be evicted by LRU.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=None, ttl_hours=None):
+        self.cache_dir = Path(cache_dir or os.getenv('DOCUMENT_CACHE_DIR', 'taxes_files/.document_cache'))
+        self.index_path = self.cache_dir / "index.json"
+        self.max_entries = max_entries or int(os.getenv('DOCUMENT_CACHE_MAX_ENTRIES', '500'))
+        self.ttl_hours = dict(DEFAULT_TTL_HOURS)
+        for doc_type in self.ttl_hours:
+            env_value = os.getenv(f'DOCUMENT_CACHE_TTL_HOURS_{doc_type.upper()}')
+            if env_value:
+                self.ttl_hours[doc_type] = float(env_value)
+        if ttl_hours:
+            self.ttl_hours.update(ttl_hours)
+        self.lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        temp_path = self.index_path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(temp_path, self.index_path)
+
+    def _entry_key(self, stage, input_hash):
+        return f"{stage}_{input_hash}_{stage_fingerprint(stage)}"
+
+    def _is_expired(self, entry, now):
+        ttl = self.ttl_hours.get(entry['doc_type'])
+        return ttl is not None and now - entry['created_at'] > ttl * 3600
+
+    def _remove_entry(self, key):
+        self.index.pop(key, None)
+        shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+        self.stats['evictions'] += 1
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones above the size cap"""
+        for key in [k for k, entry in self.index.items() if self._is_expired(entry, now)]:
+            self._remove_entry(key)
+        if len(self.index) > self.max_entries:
+            by_last_used = sorted(self.index, key=lambda k: self.index[k]['last_used'])
+            for key in by_last_used[:len(self.index) - self.max_entries]:
+                self._remove_entry(key)
+
+    def restore(self, stage, input_hash, outputs):
+        """Copy cached outputs into place and return the cached stage result, or None"""
+        key = self._entry_key(stage, input_hash)
+        now = time.time()
+        with self.lock:
+            entry = self.index.get(key)
+            if entry and self._is_expired(entry, now):
+                self._remove_entry(key)
+                self._save_index()
+                entry = None
+            if not entry or sorted(entry['files']) != sorted(Path(p).name for p in outputs):
+                self.stats['misses'] += 1
+                return None
+            try:
+                for output in outputs:
+                    shutil.copy2(self.cache_dir / key / Path(output).name, output)
+            except OSError as e:
+                print(f"Document cache entry {key} unreadable, dropping: {e}")
+                self._remove_entry(key)
+                self._save_index()
+                self.stats['misses'] += 1
+                return None
+            entry['last_used'] = now
+            self._save_index()
+            self.stats['hits'] += 1
+            return entry['result']
+
+    def store(self, stage, input_hash, outputs, result):
+        """Save a successful stage's outputs for reuse by later sessions"""
+        doc_type = STAGE_DOCUMENT_TYPES.get(stage)
+        if doc_type is None:
+            return
+        key = self._entry_key(stage, input_hash)
+        now = time.time()
+        with self.lock:
+            try:
+                entry_dir = self.cache_dir / key
+                entry_dir.mkdir(parents=True, exist_ok=True)
+                for output in outputs:
+                    shutil.copy2(output, entry_dir / Path(output).name)
+            except OSError as e:
+                print(f"Could not cache {stage} outputs: {e}")
+                shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+                return
+            self.index[key] = {
+                'stage': stage,
+                'doc_type': doc_type,
+                'files': [Path(p).name for p in outputs],
+                'result': result,
+                'created_at': now,
+                'last_used': now
+            }
+            self.stats['stores'] += 1
+            self._evict(now)
+            self._save_index()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.index))
+
+_document_cache = None
+_document_cache_lock = threading.Lock()
+
+def get_document_cache():
+    """Process-wide document cache shared by all sessions"""
+    global _document_cache
+    with _document_cache_lock:
+        if _document_cache is None:
+            _document_cache = DocumentCache()
+        return _document_cache
@@ -5,6 +5,15 @@ from pathlib import Path
 import subprocess
 import sys
 import uuid
+from pipeline_checkpoints import PipelineCheckpoints
+from document_cache import get_document_cache
+from session_janitor import get_session_index, directory_size
+from enrichment import async_enrichment_enabled, get_enrichment_client, load_enrichment
+
+# Uploads up to this size are kept in memory and handed straight to PyMuPDF
+IN_MEMORY_UPLOAD_LIMIT = int(os.getenv('IN_MEMORY_UPLOAD_LIMIT', str(8 * 1024 * 1024)))
+# How long Excel generation waits for background name/address enrichment
+ENRICHMENT_WAIT_SECONDS = float(os.getenv('ENRICHMENT_WAIT_SECONDS', '30'))
 
 class DocumentProcessor:
     def __init__(self, session_id=None):
@@ -18,6 +27,17 @@ class DocumentProcessor:
         # Create directories if they don't exist
         for directory in [self.uploads_dir, self.extracted_dir, self.parsed_dir, self.excel_dir]:
             directory.mkdir(parents=True, exist_ok=True)
+
+        self.checkpoints = PipelineCheckpoints(self.base_dir / "checkpoints")
+        # Outputs of identical documents processed in earlier sessions
+        use_cache = os.getenv('DOCUMENT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.document_cache = get_document_cache() if use_cache else None
+        # Contents of small uploads, keyed by their path in the uploads directory
+        self.upload_buffers = {}
+        # Background Groq enrichment of the Aadhar name and address, if started
+        self.enrichment_future = None
+        self.session_index = get_session_index()
+        self.session_index.touch(self.session_id)
         
         print(f"Created session: {self.session_id}")
 
@@ -52,91 +72,216 @@ class DocumentProcessor:
             traceback.print_exc()
             return {'status': 'error', 'message': str(e)}
 
-    def run_extractors(self):
-        """Run all extractor scripts on the uploaded files"""
-        results = {}
-        
-        # Run Form16 extractor
+    def save_upload_streams(self, aadhar_file, passbook_file, form16_file):
+        """Stream uploaded file objects directly into the session's uploads directory"""
+        try:
+            print(f"Streaming uploads to: {self.uploads_dir}")
+            for upload, filename in [(aadhar_file, "aadhar.pdf"), (passbook_file, "bank.pdf"), (form16_file, "form16.pdf")]:
+                destination = self.uploads_dir / filename
+                stream = getattr(upload, 'stream', upload)
+                head = stream.read(IN_MEMORY_UPLOAD_LIMIT + 1)
+                with open(destination, 'wb') as f:
+                    f.write(head)
+                    if len(head) > IN_MEMORY_UPLOAD_LIMIT:
+                        shutil.copyfileobj(stream, f, 1024 * 1024)
+                if len(head) <= IN_MEMORY_UPLOAD_LIMIT:
+                    self.upload_buffers[str(destination)] = head
+                print(f"{filename} saved")
+
+            return {
+                'status': 'success',
+                'message': 'Files saved successfully',
+                'files': {
+                    'aadhar': str(self.uploads_dir / "aadhar.pdf"),
+                    'bank': str(self.uploads_dir / "bank.pdf"),
+                    'form16': str(self.uploads_dir / "form16.pdf")
+                }
+            }
+        except Exception as e:
+            print(f"Error saving files: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {'status': 'error', 'message': str(e)}
+
+    def _upload_bytes(self, filename):
+        """In-memory contents of an upload, or None if it was too large to buffer"""
+        return self.upload_buffers.get(str(self.uploads_dir / filename))
+
+    def _stage_succeeded(self, result):
+        """Stage results are either 'success' strings or result dicts with a status"""
+        if isinstance(result, dict):
+            return result.get('status') == 'success'
+        return result == 'success'
+
+    def _run_stage(self, stage, inputs, outputs, func, extra=None, cacheable=True):
+        """Run a pipeline stage unless its checkpoint or the document cache matches the current inputs"""
+        input_hash = self.checkpoints.hash_inputs(inputs, extra, buffers=self.upload_buffers)
+        checkpoint = self.checkpoints.get_fresh(stage, input_hash)
+        if checkpoint:
+            print(f"Stage {stage} inputs unchanged, reusing checkpoint")
+            return checkpoint['result']
+
+        use_cache = cacheable and self.document_cache is not None
+        if use_cache:
+            cached_result = self.document_cache.restore(stage, input_hash, outputs)
+            if cached_result is not None:
+                print(f"Stage {stage} served from document cache")
+                self.checkpoints.record(stage, input_hash, outputs, cached_result)
+                return cached_result
+
+        result = func()
+        if self._stage_succeeded(result):
+            self.checkpoints.record(stage, input_hash, outputs, result)
+            if use_cache:
+                self.document_cache.store(stage, input_hash, outputs, result)
+        else:
+            self.checkpoints.invalidate(stage)
+        return result
+
+    def _extract_form16(self):
         try:
             from form16_extractor_local import Form16ExtractorLocal
             extractor = Form16ExtractorLocal()
-            result = extractor.extract_form16_data(str(self.uploads_dir / "form16.pdf"))
+            result = extractor.extract_form16_data(
+                str(self.uploads_dir / "form16.pdf"), pdf_bytes=self._upload_bytes("form16.pdf")
+            )
             if result['status'] == 'success':
                 # Save extracted data
                 with open(self.extracted_dir / "form16_extracted.json", 'w') as f:
                     json.dump(result['data'], f, indent=2)
-                results['form16'] = 'success'
-            else:
-                results['form16'] = f"error: {result['message']}"
+                return 'success'
+            return f"error: {result['message']}"
         except Exception as e:
-            results['form16'] = f"error: {str(e)}"
+            return f"error: {str(e)}"
 
-        # Run Passbook extractor
+    def _extract_passbook(self):
         try:
             from passbook_extractor_local import PassbookExtractorLocal
             extractor = PassbookExtractorLocal()
-            result = extractor.extract_passbook_data(str(self.uploads_dir / "bank.pdf"))
+            result = extractor.extract_passbook_data(
+                str(self.uploads_dir / "bank.pdf"), pdf_bytes=self._upload_bytes("bank.pdf")
+            )
             if result['status'] == 'success':
                 # Save extracted data
                 with open(self.extracted_dir / "passbook_extracted.json", 'w') as f:
                     json.dump(result['data'], f, indent=2)
-                results['passbook'] = 'success'
-            else:
-                results['passbook'] = f"error: {result['message']}"
+                return 'success'
+            return f"error: {result['message']}"
         except Exception as e:
-            results['passbook'] = f"error: {str(e)}"
+            return f"error: {str(e)}"
 
-        # Run Aadhar extractor (saves to parsed folder since it includes parsing)
+    def _extract_aadhar(self):
+        # Aadhar extractor saves to parsed folder since it includes parsing
         try:
             from aadhar_extractor_local import AadharExtractorLocal
             extractor = AadharExtractorLocal()
-            result = extractor.extract_aadhar_data(str(self.uploads_dir / "aadhar.pdf"))
+            result = extractor.extract_aadhar_data(
+                str(self.uploads_dir / "aadhar.pdf"), pdf_bytes=self._upload_bytes("aadhar.pdf")
+            )
             if result['status'] == 'success':
                 # Save parsed data directly to parsed folder
                 with open(self.parsed_dir / "aadhar_parsed.json", 'w') as f:
                     json.dump(result['data'], f, indent=2)
-                results['aadhar'] = 'success'
-            else:
-                results['aadhar'] = f"error: {result['message']}"
+                return 'success'
+            return f"error: {result['message']}"
         except Exception as e:
-            results['aadhar'] = f"error: {str(e)}"
+            return f"error: {str(e)}"
 
-        return results
+    def _start_enrichment(self):
+        """Parse the Aadhar name and address with Groq in the background
 
-    def run_parsers(self):
-        """Run parser scripts on extracted JSON files"""
+        Runs while the Form 16 and passbook branches are still extracting; skipped
+        when aadhar_enriched.json already matches the current Aadhar data.
+        """
+        if not async_enrichment_enabled():
+            return
+        try:
+            with open(self.parsed_dir / "aadhar_parsed.json", 'r') as f:
+                aadhar_data = json.load(f)
+            if load_enrichment(self.parsed_dir, aadhar_data) is None:
+                self.enrichment_future = get_enrichment_client().submit(aadhar_data, self.parsed_dir)
+        except Exception as e:
+            print(f"Could not start Aadhar enrichment: {e}")
+
+    def _await_enrichment(self):
+        """Wait for background enrichment; the Excel filler parses inline if it did not finish"""
+        if self.enrichment_future is None:
+            return
+        try:
+            self.enrichment_future.result(timeout=ENRICHMENT_WAIT_SECONDS)
+        except Exception as e:
+            print(f"Aadhar enrichment did not complete: {e!r}")
+        finally:
+            self.enrichment_future = None
+
+    def run_extractors(self):
+        """Run all extractor scripts on the uploaded files"""
         results = {}
-        
-        # Run Form16 parser
+        # Aadhar first, so its Groq enrichment overlaps the Form 16 and passbook extraction
+        results['aadhar'] = self._run_stage(
+            'aadhar_extractor',
+            [self.uploads_dir / "aadhar.pdf"],
+            [self.parsed_dir / "aadhar_parsed.json"],
+            self._extract_aadhar
+        )
+        if self._stage_succeeded(results['aadhar']):
+            self._start_enrichment()
+        results['form16'] = self._run_stage(
+            'form16_extractor',
+            [self.uploads_dir / "form16.pdf"],
+            [self.extracted_dir / "form16_extracted.json"],
+            self._extract_form16
+        )
+        results['passbook'] = self._run_stage(
+            'passbook_extractor',
+            [self.uploads_dir / "bank.pdf"],
+            [self.extracted_dir / "passbook_extracted.json"],
+            self._extract_passbook
+        )
+        return results
+
+    def _parse_form16(self):
         try:
             from form16_parser import parse_form16
             result = parse_form16("local", str(self.extracted_dir / "form16_extracted.json"))
             if result['status'] == 'success':
                 # Move parsed file to parsed directory
                 shutil.move("form16_parsed.json", self.parsed_dir / "form16_parsed.json")
-                results['form16_parser'] = 'success'
-            else:
-                results['form16_parser'] = f"error: {result['message']}"
+                return 'success'
+            return f"error: {result['message']}"
         except Exception as e:
-            results['form16_parser'] = f"error: {str(e)}"
+            return f"error: {str(e)}"
 
-        # Run Passbook parser
+    def _parse_passbook(self):
         try:
             from passbook_parser import parse_passbook
             result = parse_passbook("local", str(self.extracted_dir / "passbook_extracted.json"))
             if result['status'] == 'success':
                 # Move parsed file to parsed directory
                 shutil.move("passbook_parsed.json", self.parsed_dir / "passbook_parsed.json")
-                results['passbook_parser'] = 'success'
-            else:
-                results['passbook_parser'] = f"error: {result['message']}"
+                return 'success'
+            return f"error: {result['message']}"
         except Exception as e:
-            results['passbook_parser'] = f"error: {str(e)}"
+            return f"error: {str(e)}"
 
+    def run_parsers(self):
+        """Run parser scripts on extracted JSON files"""
+        results = {}
+        results['form16_parser'] = self._run_stage(
+            'form16_parser',
+            [self.extracted_dir / "form16_extracted.json"],
+            [self.parsed_dir / "form16_parsed.json"],
+            self._parse_form16
+        )
+        results['passbook_parser'] = self._run_stage(
+            'passbook_parser',
+            [self.extracted_dir / "passbook_extracted.json"],
+            [self.parsed_dir / "passbook_parsed.json"],
+            self._parse_passbook
+        )
         return results
 
-    def generate_excel(self, email='', mobile_no=''):
-        """Generate Excel file from parsed JSON data"""
+    def _fill_excel(self, email, mobile_no):
         try:
             print("Starting Excel generation...")
             from excel_filler_local import ExcelFiller
@@ -150,12 +295,34 @@ class DocumentProcessor:
             traceback.print_exc()
             return {'status': 'error', 'message': str(e)}
 
+    def generate_excel(self, email='', mobile_no=''):
+        """Generate Excel file from parsed JSON data"""
+        self._await_enrichment()
+        return self._run_stage(
+            'excel',
+            [
+                self.parsed_dir / "form16_parsed.json",
+                self.parsed_dir / "aadhar_parsed.json",
+                self.parsed_dir / "passbook_parsed.json",
+                Path("itr_temp.xlsx")
+            ],
+            [self.excel_dir / "filled_itr.xlsx"],
+            lambda: self._fill_excel(email, mobile_no),
+            extra={'email': email, 'mobile_no': mobile_no},
+            cacheable=False
+        )
+
+    def has_uploads(self):
+        """Check whether all three uploaded documents are present in the session"""
+        return all((self.uploads_dir / name).exists() for name in ["aadhar.pdf", "bank.pdf", "form16.pdf"])
+
     def cleanup_session(self):
         """Delete all session files and directories"""
         try:
             if self.base_dir.exists():
                 shutil.rmtree(self.base_dir)
                 print(f"Cleaned up session: {self.session_id}")
+            self.session_index.remove(self.session_id)
         except Exception as e:
             print(f"Error cleaning up session {self.session_id}: {e}")
 
@@ -169,7 +336,43 @@ class DocumentProcessor:
                 print(f"File save failed: {save_result['message']}")
                 return save_result
             print("Files saved successfully")
+        except Exception as e:
+            print(f"Error in process_documents: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {'status': 'error', 'message': str(e)}
+
+        return self._run_pipeline(email, mobile_no)
+
+    def process_uploads(self, aadhar_file, passbook_file, form16_file, email='', mobile_no=''):
+        """Complete pipeline for uploaded file objects, without an intermediate temp copy"""
+        save_result = self.save_upload_streams(aadhar_file, passbook_file, form16_file)
+        if save_result['status'] != 'success':
+            print(f"File save failed: {save_result['message']}")
+            return save_result
+        try:
+            return self._run_pipeline(email, mobile_no)
+        finally:
+            # Buffers are only needed while the extractors run
+            self.upload_buffers.clear()
+
+    def resume(self, email='', mobile_no=''):
+        """Re-run the pipeline on an existing session, skipping stages whose inputs are unchanged"""
+        if not self.has_uploads():
+            return {'status': 'error', 'message': f'No uploaded documents found for session {self.session_id}'}
+        print(f"Resuming session {self.session_id}")
+        return self._run_pipeline(email, mobile_no)
 
+    def _run_pipeline(self, email='', mobile_no=''):
+        """Run extraction, parsing and Excel generation on the saved uploads"""
+        try:
+            return self._run_pipeline_stages(email, mobile_no)
+        finally:
+            # Keep the janitor's view of this session's disk usage current
+            self.session_index.touch(self.session_id, directory_size(self.base_dir))
+
+    def _run_pipeline_stages(self, email, mobile_no):
+        try:
             # Step 2: Run extractors
             print("Step 2: Running extractors")
             extraction_results = self.run_extractors()
@@ -188,9 +391,26 @@ class DocumentProcessor:
             print(f"Error in process_documents: {str(e)}")
             import traceback
             traceback.print_exc()
-            return {'status': 'error', 'message': str(e)}
+            return {'status': 'error', 'message': str(e), 'session_id': self.session_id, 'resumable': True}
 
-        return {
+        # Failed stages had their checkpoints invalidated, so a resume retries only them.
+        # Excel generation is the only fatal one: without it there is nothing to download.
+        stage_results = dict(extraction_results, **parsing_results)
+        failed_stages = {stage: result for stage, result in stage_results.items() if not self._stage_succeeded(result)}
+        if not self._stage_succeeded(excel_result):
+            failed_stages['excel'] = excel_result
+            return {
+                'status': 'error',
+                'message': f"Stages failed: {', '.join(failed_stages)} ({self._failure_messages(failed_stages)})",
+                'session_id': self.session_id,
+                'resumable': True,
+                'failed_stages': failed_stages,
+                'extraction_results': extraction_results,
+                'parsing_results': parsing_results,
+                'excel_result': excel_result
+            }
+
+        result = {
             'status': 'success',
             'message': 'Document processing completed',
             'session_id': self.session_id,
@@ -210,6 +430,18 @@ class DocumentProcessor:
                 'excel': str(self.excel_dir / "filled_itr.xlsx")
             }
         }
+        if failed_stages:
+            # The Excel is partial; the session can be resumed to retry the failed stages
+            result['message'] = (f"Document processing completed with failed stages: {', '.join(failed_stages)} "
+                                 f"({self._failure_messages(failed_stages)})")
+            result['failed_stages'] = failed_stages
+            result['resumable'] = True
+        return result
+
+    def _failure_messages(self, failed_stages):
+        messages = [result.get('message', 'error') if isinstance(result, dict) else result
+                    for result in failed_stages.values()]
+        return '; '.join(map(str, messages))
 
 if __name__ == "__main__":
     processor = DocumentProcessor()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ENRICHED_FILENAME = "aadhar_enriched.json"
+
+def enrichment_source(aadhar_data):
+    """The Aadhar fields an enrichment was computed from"""
+    return {'name': aadhar_data.get('name') or '', 'address': aadhar_data.get('address') or ''}
+
+def load_enrichment(parsed_dir, aadhar_data):
+    """Enriched name/address for the current Aadhar data, or None if missing or stale"""
+    path = Path(parsed_dir) / ENRICHED_FILENAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r') as f:
+            enriched = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if enriched.get('source') != enrichment_source(aadhar_data):
+        return None
+    return enriched
+
+def save_enrichment(parsed_dir, aadhar_data, parsed_name, parsed_address):
+    """Atomically write aadhar_enriched.json for the given Aadhar data"""
+    enriched = {'source': enrichment_source(aadhar_data), 'name': parsed_name, 'address': parsed_address}
+    path = Path(parsed_dir) / ENRICHED_FILENAME
+    temp_path = path.with_suffix('.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(enriched, f, indent=2)
+    os.replace(temp_path, path)
+    return enriched
+
+class EnrichmentClient:
+    """Runs Groq name/address enrichment on a background asyncio loop
+
+    DocumentProcessor submits the Aadhar data as soon as its branch finishes and
+    the enrichment runs while Form 16 and passbook are still in Textract; the Excel
+    filler then reads the result from parsed/aadhar_enriched.json. GroqParser is
+    blocking, so each call runs in a worker thread via asyncio.to_thread.
+    """
+
+    def __init__(self, timeout_seconds=None):
+        if timeout_seconds is None:
+            timeout_seconds = float(os.getenv('ENRICHMENT_TIMEOUT_SECONDS', '30'))
+        self.timeout_seconds = timeout_seconds
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="enrichment-loop", daemon=True)
+                self.thread.start()
+            return self.loop
+
+    async def _enrich(self, aadhar_data, parsed_dir):
+        from groq_parser import GroqParser
+        source = enrichment_source(aadhar_data)
+        parsed = await asyncio.wait_for(
+            asyncio.to_thread(GroqParser().parse_name_and_address, source['name'], source['address']),
+            self.timeout_seconds
+        )
+        return save_enrichment(parsed_dir, aadhar_data, parsed['name'], parsed['address'])
+
+    def submit(self, aadhar_data, parsed_dir):
+        """Start enriching in the background; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self._enrich(aadhar_data, parsed_dir), self._ensure_loop())
+
+_client = None
+_lock = threading.Lock()
+
+def async_enrichment_enabled():
+    return os.getenv('ENRICHMENT_ASYNC', 'true').lower() == 'true'
+
+def get_enrichment_client():
+    """Process-wide enrichment client"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = EnrichmentClient()
+        return _client
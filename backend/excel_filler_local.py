@@ -1,7 +1,7 @@
 import json
 import os
 from pathlib import Path
-from openpyxl import load_workbook
+from template_cache import load_template
 
 class ExcelFiller:
     def __init__(self, session_id=None):
@@ -51,7 +51,7 @@ class ExcelFiller:
             
             # Load Excel workbook
             print(f"Loading template from: {template_path}")
-            wb = load_workbook(str(template_path))
+            wb = load_template(template_path)
             ws = wb.active
             print("Template loaded successfully")
             
@@ -107,15 +107,20 @@ class ExcelFiller:
             parsed_address = {}
             
             try:
-                from groq_parser import GroqParser
-                parser = GroqParser()
-                
-                if "name" in aadhar_data and aadhar_data["name"]:
-                    parsed_name = parser.parse_name(aadhar_data["name"])
+                # Enrichment started by DocumentProcessor once the Aadhar was extracted
+                from enrichment import load_enrichment
+                parsed = load_enrichment(self.parsed_dir, aadhar_data)
+                if parsed is None:
+                    from groq_parser import GroqParser
+                    parser = GroqParser()
+                    
+                    # One round trip for both fields
+                    parsed = parser.parse_name_and_address(aadhar_data.get("name"), aadhar_data.get("address"))
+                parsed_name = parsed["name"]
+                parsed_address = parsed["address"]
+                if parsed_name:
                     print(f"Parsed name: {parsed_name}")
-                
-                if "address" in aadhar_data and aadhar_data["address"]:
-                    parsed_address = parser.parse_address(aadhar_data["address"])
+                if parsed_address:
                     print(f"Parsed address: {parsed_address}")
             except Exception as e:
                 print(f"Groq parsing error: {e}")
@@ -1,17 +1,235 @@
 import os
+import re
 import json
+import random
+import textwrap
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from address_parser import confidence_threshold, parse_address_rules
+from parse_cache import get_parse_cache
+from pin_directory import get_pin_directory
 
 load_dotenv()
 
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+PIN_CODE = re.compile(r'\b\d{6}\b')
+
+NAME_FIELDS = ['first_name', 'middle_name', 'last_name']
+STREET_FIELDS = ['flat_door_block_no', 'premises_building_village', 'road_street_post_office', 'area_locality']
+LOCATION_FIELDS = ['town_city_district', 'state', 'pin_code']
+
+# Address components asked of the model; the location ones are left out when the
+# PIN directory already knows the district and state
+STREET_KEYS = """- flat_door_block_no: Only the flat/door/house number (like "15", "A-101", "23B")
+- premises_building_village: Building/colony/village name (like "Ashok Nagar", "Green Park")
+- road_street_post_office: Road/street name
+- area_locality: Area/locality name"""
+LOCATION_KEYS = """- town_city_district: Valid Indian city/district name only
+- state: Valid Indian state name only
+- pin_code: 6-digit PIN code if found"""
+
+class GroqBudgetExceeded(Exception):
+    """The per-call latency budget ran out before Groq answered"""
+
+class GroqCircuitOpen(Exception):
+    """The circuit breaker is open, so Groq was not called"""
+
+_session = None
+_session_lock = threading.Lock()
+_metrics = {
+    'calls': 0, 'retries': 0, 'failures': 0, 'budget_exceeded': 0, 'rule_based_addresses': 0,
+    'bulk_requests': 0, 'bulk_items': 0, 'bulk_item_retries': 0, 'bulk_fallbacks': 0,
+    'short_circuited': 0, 'hedged': 0, 'hedge_wins': 0
+}
+_metrics_lock = threading.Lock()
+# Latencies of recent answered requests, for the hedging delay
+_latencies = deque(maxlen=200)
+
+def get_http_session():
+    """Process-wide keep-alive session for Groq calls
+
+    Reusing one session keeps TLS connections to the API open between parses
+    instead of opening a new one per name and address.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = int(os.getenv('GROQ_POOL_SIZE', '10'))
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+            session.mount('http://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+            _session = session
+        return _session
+
+class RequestRateLimiter:
+    """Sliding one-minute window of request start times, shared by the bulk callers"""
+
+    def __init__(self, requests_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.starts = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another request fits in the budget"""
+        if self.requests_per_minute <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.starts and now - self.starts[0] >= 60:
+                    self.starts.popleft()
+                if len(self.starts) < self.requests_per_minute:
+                    self.starts.append(now)
+                    return
+                wait = 60 - (now - self.starts[0])
+            time.sleep(wait)
+
+_rate_limiter = None
+
+def get_bulk_rate_limiter():
+    """Process-wide requests-per-minute budget for bulk parses (GROQ_BULK_RPM, 0 for none)"""
+    global _rate_limiter
+    with _session_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RequestRateLimiter(int(os.getenv('GROQ_BULK_RPM', '30')))
+        return _rate_limiter
+
+class CircuitBreaker:
+    """Shared breaker that sends parses straight to the local fallbacks while Groq is unhealthy
+
+    Opens when at least GROQ_BREAKER_ERROR_RATE of the last GROQ_BREAKER_WINDOW calls
+    failed or took longer than GROQ_BREAKER_SLOW_SECONDS (once GROQ_BREAKER_MIN_CALLS
+    calls are in the window). After GROQ_BREAKER_COOLDOWN_SECONDS one probe call is let
+    through: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, window=None, min_calls=None, error_rate=None, slow_seconds=None, cooldown_seconds=None):
+        env = os.getenv
+        self.window = int(env('GROQ_BREAKER_WINDOW', '20') if window is None else window)
+        self.min_calls = int(env('GROQ_BREAKER_MIN_CALLS', '5') if min_calls is None else min_calls)
+        self.error_rate = float(env('GROQ_BREAKER_ERROR_RATE', '0.5') if error_rate is None else error_rate)
+        self.slow_seconds = float(env('GROQ_BREAKER_SLOW_SECONDS', '5') if slow_seconds is None else slow_seconds)
+        self.cooldown_seconds = float(
+            env('GROQ_BREAKER_COOLDOWN_SECONDS', '30') if cooldown_seconds is None else cooldown_seconds
+        )
+        self.outcomes = deque(maxlen=self.window)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go to Groq now"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = 'half_open'
+                self.probe_in_flight = False
+            if self.state == 'half_open' and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record(self, success, latency):
+        bad = not success or latency > self.slow_seconds
+        with self.lock:
+            if self.state == 'half_open':
+                self.probe_in_flight = False
+                if bad:
+                    self._open()
+                else:
+                    self.state = 'closed'
+                    self.outcomes.clear()
+            elif self.state == 'closed':
+                self.outcomes.append(bad)
+                if len(self.outcomes) >= self.min_calls and sum(self.outcomes) >= self.error_rate * len(self.outcomes):
+                    self._open()
+
+    def _open(self):
+        print(f"Groq circuit breaker open for {self.cooldown_seconds:.0f}s")
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+        self.trips += 1
+
+    def status(self):
+        with self.lock:
+            return {'state': self.state, 'trips': self.trips, 'recent_bad': sum(self.outcomes),
+                    'recent_calls': len(self.outcomes)}
+
+_breaker = None
+_hedge_executor = None
+
+def get_circuit_breaker():
+    """Process-wide Groq circuit breaker, or None when disabled"""
+    global _breaker
+    if os.getenv('GROQ_BREAKER_ENABLED', 'true').lower() != 'true':
+        return None
+    with _session_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
+
+def get_hedge_executor():
+    """Threads for the primary and hedged copies of an attempt"""
+    global _hedge_executor
+    with _session_lock:
+        if _hedge_executor is None:
+            workers = 2 * int(os.getenv('GROQ_POOL_SIZE', '10'))
+            _hedge_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='groq-hedge')
+        return _hedge_executor
+
+def hedge_delay():
+    """Seconds to wait before hedging: the GROQ_HEDGE_PERCENTILE of recent latencies
+
+    None until GROQ_HEDGE_MIN_SAMPLES requests have been answered.
+    """
+    with _metrics_lock:
+        if len(_latencies) < int(os.getenv('GROQ_HEDGE_MIN_SAMPLES', '20')):
+            return None
+        ordered = sorted(_latencies)
+    percentile = float(os.getenv('GROQ_HEDGE_PERCENTILE', '95'))
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+def _count(metric, amount=1):
+    with _metrics_lock:
+        _metrics[metric] += amount
+
+def get_groq_stats():
+    with _metrics_lock:
+        return dict(_metrics)
+
 class GroqParser:
     def __init__(self):
         self.api_key = os.getenv('GROQ_API_KEY', 'gsk_your_api_key_here')
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+        # Overridable to point at groq_stub_server.py or another compatible endpoint
+        self.base_url = os.getenv('GROQ_BASE_URL', "https://api.groq.com/openai/v1/chat/completions")
+        self.connect_timeout = float(os.getenv('GROQ_CONNECT_TIMEOUT', '3'))
+        self.read_timeout = float(os.getenv('GROQ_READ_TIMEOUT', '10'))
+        self.max_attempts = int(os.getenv('GROQ_MAX_ATTEMPTS', '3'))
+        self.backoff_seconds = float(os.getenv('GROQ_BACKOFF_SECONDS', '0.25'))
+        # Total time a parse may spend on the API before the local fallback is used
+        self.latency_budget = float(os.getenv('GROQ_LATENCY_BUDGET_SECONDS', '8'))
+        # Send a duplicate of an attempt that is slower than the recent p95
+        self.hedge_enabled = os.getenv('GROQ_HEDGE_ENABLED', 'false').lower() == 'true'
+        # Items per bulk request, and how many times a failed item is sent again
+        self.bulk_batch_size = int(os.getenv('GROQ_BULK_BATCH_SIZE', '20'))
+        self.bulk_max_rounds = int(os.getenv('GROQ_BULK_MAX_ROUNDS', '3'))
         
     def parse_name(self, full_name):
         """Parse full name into first, middle, last name using Groq API"""
+        cached = self._cached('name', full_name)
+        if cached:
+            return cached
         try:
             prompt = f"""
 Parse this name into first name, middle name, and last name.
@@ -25,14 +243,24 @@ Example response:
 """
             
             response = self._call_groq_api(prompt)
-            return json.loads(response)
+            parsed = self._validate_parse('name', json.loads(response), full_name)
+            if parsed is None:
+                raise ValueError("Response is missing name fields")
+            self._store('name', full_name, parsed)
+            return parsed
         except Exception as e:
             print(f"Name parsing error: {e}")
             # Fallback to simple parsing
             return self._fallback_name_parse(full_name)
     
     def parse_address(self, address):
-        """Parse address into components using Groq API"""
+        """Parse address into components, using Groq API only when the rule-based split is unsure"""
+        cached = self._cached('address', address)
+        if cached:
+            return cached
+        rule_based = self._rule_based_address(address)
+        if rule_based:
+            return rule_based
         try:
             prompt = f"""
 Parse this Indian address carefully. The address may contain a person's name at the beginning which should be ignored.
@@ -40,13 +268,7 @@ Parse this Indian address carefully. The address may contain a person's name at
 Address: {address}
 
 Extract these components and return JSON:
-- flat_door_block_no: Only the flat/door/house number (like "15", "A-101", "23B")
-- premises_building_village: Building/colony/village name (like "Ashok Nagar", "Green Park")
-- road_street_post_office: Road/street name
-- area_locality: Area/locality name
-- town_city_district: Valid Indian city/district name only
-- state: Valid Indian state name only
-- pin_code: 6-digit PIN code if found
+{self._address_keys(address)}
 
 Example:
 Address: "DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093"
@@ -71,17 +293,340 @@ Return only valid JSON:
 """
             
             response = self._call_groq_api(prompt)
-            parsed = json.loads(response)
             
             # Validate and clean the response
-            return self._validate_address_components(parsed)
+            parsed = self._validate_parse('address', json.loads(response), address)
+            if parsed is None:
+                raise ValueError("Response is missing address fields")
+            self._store('address', address, parsed)
+            return parsed
         except Exception as e:
             print(f"Address parsing error: {e}")
             # Fallback to simple parsing
             return self._fallback_address_parse(address)
     
-    def _call_groq_api(self, prompt):
-        """Make API call to Groq"""
+    def parse_name_and_address(self, full_name, address):
+        """Parse a name and an address with one Groq call
+
+        Returns {"name": ..., "address": ...} in the shapes of parse_name and
+        parse_address; an empty input gives an empty dict. Each field falls back to
+        its local parser on its own when the response is malformed for it.
+        """
+        if not full_name or not address:
+            return {
+                'name': self.parse_name(full_name) if full_name else {},
+                'address': self.parse_address(address) if address else {}
+            }
+
+        cached_name = self._cached('name', full_name)
+        cached_address = self._cached('address', address) or self._rule_based_address(address)
+        if cached_name or cached_address:
+            return {
+                'name': cached_name or self.parse_name(full_name),
+                'address': cached_address or self.parse_address(address)
+            }
+
+        response = None
+        try:
+            prompt = f"""
+Parse this person's name and Indian address.
+
+Name: {full_name}
+Address: {address}
+
+Return only a JSON object with two keys:
+- "name": an object with keys first_name, middle_name, last_name (empty string if there is no middle name)
+- "address": an object with keys
+{textwrap.indent(self._address_keys(address), '  ')}
+
+Example:
+Name: "Rahul Kumar Sharma"
+Address: "DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093"
+Should return:
+{{
+  "name": {{"first_name": "Rahul", "middle_name": "Kumar", "last_name": "Sharma"}},
+  "address": {{
+    "flat_door_block_no": "15",
+    "premises_building_village": "Ashok Nagar",
+    "road_street_post_office": "Shahdara Mandoli",
+    "area_locality": "Saboli",
+    "town_city_district": "Delhi",
+    "state": "Delhi",
+    "pin_code": "110093"
+  }}
+}}
+
+IMPORTANT:
+- The address may start with a person's name (e.g. "S/O ..."); ignore it
+- Extract only numbers for flat_door_block_no
+- Use only REAL Indian state names
+- If unsure about state/city, leave empty
+
+Return only valid JSON:
+"""
+            response = self._extract_json(self._call_groq_api(prompt, max_tokens=400))
+        except Exception as e:
+            print(f"Combined name/address parsing error: {e}")
+
+        parsed_name = self._validate_parse('name', response.get('name') if response else None, full_name)
+        if parsed_name is None:
+            print("Combined parse returned no usable name, using fallback")
+            parsed_name = self._fallback_name_parse(full_name)
+        else:
+            self._store('name', full_name, parsed_name)
+
+        parsed_address = self._validate_parse('address', response.get('address') if response else None, address)
+        if parsed_address is None:
+            print("Combined parse returned no usable address, using fallback")
+            parsed_address = self._fallback_address_parse(address)
+        else:
+            self._store('address', address, parsed_address)
+
+        return {'name': parsed_name, 'address': parsed_address}
+
+    def parse_names_bulk(self, names):
+        """Parse many names with one Groq request per GROQ_BULK_BATCH_SIZE names
+
+        Returns the parses in input order, in the shape of parse_name.
+        """
+        return self._parse_bulk('name', names)
+
+    def parse_addresses_bulk(self, addresses):
+        """Parse many addresses with one Groq request per GROQ_BULK_BATCH_SIZE addresses
+
+        Cached and confidently rule-parsed addresses never reach the API. Returns the
+        parses in input order, in the shape of parse_address.
+        """
+        return self._parse_bulk('address', addresses)
+
+    def _parse_bulk(self, kind, items):
+        """Pack pending items into indexed batch prompts, re-sending only the items that failed
+
+        Every request waits for the GROQ_BULK_RPM budget. Items still unparsed after
+        GROQ_BULK_MAX_ROUNDS requests use the local fallback parser.
+        """
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            if not item:
+                results[index] = {}
+                continue
+            cached = self._cached(kind, item)
+            if cached is None and kind == 'address':
+                cached = self._rule_based_address(item)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+        _count('bulk_items', len(pending))
+
+        for round_number in range(self.bulk_max_rounds):
+            if not pending:
+                break
+            if round_number:
+                _count('bulk_item_retries', len(pending))
+            failed = []
+            for start in range(0, len(pending), self.bulk_batch_size):
+                batch = pending[start:start + self.bulk_batch_size]
+                parsed = self._call_bulk_batch(kind, [items[index] for index in batch])
+                for position, index in enumerate(batch):
+                    value = self._validate_parse(kind, parsed.get(str(position)), items[index])
+                    if value is None:
+                        failed.append(index)
+                    else:
+                        self._store(kind, items[index], value)
+                        results[index] = value
+            pending = failed
+
+        _count('bulk_fallbacks', len(pending))
+        for index in pending:
+            if kind == 'name':
+                results[index] = self._fallback_name_parse(items[index])
+            else:
+                results[index] = self._fallback_address_parse(items[index])
+        return results
+
+    def _call_bulk_batch(self, kind, batch):
+        """One indexed batch request; returns {"<index>": parse}, empty on failure"""
+        numbered = "\n".join(f"{position}: {item}" for position, item in enumerate(batch))
+        if kind == 'name':
+            noun = "person's name"
+            keys = "first_name, middle_name, last_name (empty string if there is no middle name)"
+            example = '{"0": {"first_name": "Rahul", "middle_name": "Kumar", "last_name": "Sharma"}}'
+            tokens_per_item = 40
+        else:
+            noun = "Indian address"
+            keys = "\n" + STREET_KEYS + "\n" + LOCATION_KEYS + "\nIgnore any person's name (e.g. \"S/O ...\") at the start of an address."
+            example = ('{"0": {"flat_door_block_no": "15", "premises_building_village": "Ashok Nagar", '
+                       '"road_street_post_office": "Shahdara Mandoli", "area_locality": "Saboli", '
+                       '"town_city_district": "Delhi", "state": "Delhi", "pin_code": "110093"}}')
+            tokens_per_item = 120
+        prompt = f"""
+Parse each numbered {noun} below.
+
+{numbered}
+
+Return only a JSON object mapping each number (as a string) to an object with keys: {keys}
+
+Example:
+{example}
+
+Return only valid JSON:
+"""
+        get_bulk_rate_limiter().acquire()
+        _count('bulk_requests')
+        try:
+            return self._extract_json(self._call_groq_api(prompt, max_tokens=tokens_per_item * len(batch) + 50))
+        except Exception as e:
+            print(f"Bulk {kind} parsing error: {e}")
+            return {}
+
+    def _validate_parse(self, kind, parsed, raw):
+        """A usable name or address parse from a model response, or None
+
+        Every requested key must be present as a string. An address may leave out
+        the city, state and PIN code only when the PIN directory resolves them.
+        """
+        if not isinstance(parsed, dict):
+            return None
+        if kind == 'name':
+            keys = NAME_FIELDS
+        elif self._pin_resolves(raw):
+            keys = STREET_FIELDS
+        else:
+            keys = STREET_FIELDS + LOCATION_FIELDS
+        if not all(isinstance(parsed.get(key), str) for key in keys):
+            return None
+        if kind == 'name':
+            return parsed
+        return self._validate_address_components(parsed, raw)
+
+    def _rule_based_address(self, address):
+        """Rule-based address split when it is confident enough to skip the API, else None"""
+        if not address:
+            return None
+        try:
+            components, confidence = parse_address_rules(address)
+        except Exception as e:
+            print(f"Rule-based address parsing error: {e}")
+            return None
+        if confidence < confidence_threshold():
+            return None
+        _count('rule_based_addresses')
+        return self._validate_address_components(components, address)
+
+    def _locate(self, pin_code):
+        """District and state for a PIN code from the offline directory, or None"""
+        try:
+            return get_pin_directory().lookup(pin_code)
+        except Exception as e:
+            print(f"PIN directory error: {e}")
+            return None
+
+    def _pin_resolves(self, address):
+        """Whether the PIN directory knows the district and state of the address's PIN code"""
+        match = PIN_CODE.search(address or '')
+        location = self._locate(match.group()) if match else None
+        return bool(location and location['district'])
+
+    def _address_keys(self, address):
+        """Components to ask the model for; district and state are skipped when the PIN resolves them"""
+        if self._pin_resolves(address):
+            return STREET_KEYS + "\n(Return only these four keys; the city, state and PIN code are filled in separately.)"
+        return STREET_KEYS + "\n" + LOCATION_KEYS
+
+    def _cached(self, kind, raw):
+        """Cached API parse of a name or address, or None"""
+        cache = get_parse_cache()
+        if not cache or not raw:
+            return None
+        try:
+            return cache.get(kind, raw)
+        except Exception as e:
+            print(f"Parse cache read error: {e}")
+            return None
+
+    def _store(self, kind, raw, parsed):
+        cache = get_parse_cache()
+        if not cache or not raw:
+            return
+        try:
+            cache.put(kind, raw, parsed)
+        except Exception as e:
+            print(f"Parse cache write error: {e}")
+
+    def _extract_json(self, response):
+        """Parse the JSON object in a model response, ignoring any text around it"""
+        start = response.find('{')
+        end = response.rfind('}')
+        if start == -1 or end < start:
+            raise ValueError("No JSON object in response")
+        parsed = json.loads(response[start:end + 1])
+        if not isinstance(parsed, dict):
+            raise ValueError("Response is not a JSON object")
+        return parsed
+
+    def _call_groq_api(self, prompt, max_tokens=200):
+        """Make API call to Groq through the circuit breaker"""
+        breaker = get_circuit_breaker()
+        if breaker and not breaker.allow():
+            _count('short_circuited')
+            raise GroqCircuitOpen("Groq circuit breaker is open")
+        start = time.monotonic()
+        try:
+            content = self._request_with_retries(prompt, max_tokens)
+        except Exception:
+            if breaker:
+                breaker.record(False, time.monotonic() - start)
+            raise
+        if breaker:
+            breaker.record(True, time.monotonic() - start)
+        return content
+
+    def _timed_post(self, headers, data, timeout):
+        start = time.monotonic()
+        response = get_http_session().post(self.base_url, headers=headers, json=data, timeout=timeout)
+        with _metrics_lock:
+            _latencies.append(time.monotonic() - start)
+        return response
+
+    def _post(self, headers, data, timeout):
+        """POST one attempt, hedged with a duplicate when it outlasts the recent p95 latency
+
+        The first response that is not retryable wins; the other request is left to
+        finish in the background.
+        """
+        delay = hedge_delay() if self.hedge_enabled else None
+        if delay is None:
+            return self._timed_post(headers, data, timeout)
+        executor = get_hedge_executor()
+        primary = executor.submit(self._timed_post, headers, data, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        _count('hedged')
+        hedge = executor.submit(self._timed_post, headers, data, timeout)
+        pending = {primary, hedge}
+        response = error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if result.status_code not in RETRYABLE_STATUS:
+                    if future is hedge:
+                        _count('hedge_wins')
+                    return result
+                response = result
+        if response is not None:
+            return response
+        raise error
+
+    def _request_with_retries(self, prompt, max_tokens):
+        """Make API call to Groq, retrying transient failures within the latency budget"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -93,14 +638,44 @@ Return only valid JSON:
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.1,
-            "max_tokens": 200
+            "max_tokens": max_tokens
         }
         
-        response = requests.post(self.base_url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['choices'][0]['message']['content'].strip()
+        _count('calls')
+        deadline = time.monotonic() + self.latency_budget
+        for attempt in range(1, self.max_attempts + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            retry_after = None
+            try:
+                response = self._post(
+                    headers, data, (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                )
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_attempts:
+                    response.raise_for_status()
+                    result = response.json()
+                    return result['choices'][0]['message']['content'].strip()
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_attempts:
+                    _count('failures')
+                    raise
+            except requests.RequestException:
+                _count('failures')
+                raise
+
+            # Full jitter backoff, honouring Retry-After when the API sends one
+            delay = random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            if time.monotonic() + delay >= deadline:
+                break
+            _count('retries')
+            time.sleep(delay)
+
+        _count('budget_exceeded')
+        raise GroqBudgetExceeded(f"Groq call exceeded its {self.latency_budget:.1f}s latency budget")
     
     def _fallback_name_parse(self, full_name):
         """Fallback name parsing without API"""
@@ -115,8 +690,8 @@ Return only valid JSON:
         else:
             return {"first_name": parts[0], "middle_name": " ".join(parts[1:-1]), "last_name": parts[-1]}
     
-    def _validate_address_components(self, parsed):
-        """Validate and clean address components"""
+    def _validate_address_components(self, parsed, address=None):
+        """Validate and clean address components, filling district and state from the PIN code"""
         indian_states = {
             'andhra pradesh', 'arunachal pradesh', 'assam', 'bihar', 'chhattisgarh',
             'goa', 'gujarat', 'haryana', 'himachal pradesh', 'jharkhand', 'karnataka',
@@ -136,20 +711,35 @@ Return only valid JSON:
         # Validate PIN code
         pin_code = parsed.get('pin_code', '')
         if not pin_code or not pin_code.isdigit() or len(pin_code) != 6:
-            parsed['pin_code'] = ''
+            match = PIN_CODE.search(address or '')
+            parsed['pin_code'] = match.group() if match else ''
         
         # Ensure flat_door_block_no exists
         if 'flat_door_block_no' not in parsed:
             parsed['flat_door_block_no'] = ''
         
+        return self._fill_location(parsed)
+
+    def _fill_location(self, parsed):
+        """Fill a blank state and city from the PIN directory
+
+        The state is only overridden on an exact hit in the PIN index; the prefix
+        table is a guess and never replaces a state that is already there.
+        """
+        location = self._locate(parsed.get('pin_code'))
+        if location:
+            if location['district'] or not parsed.get('state'):
+                parsed['state'] = location['state']
+            if location['district'] and not parsed.get('town_city_district'):
+                parsed['town_city_district'] = location['district']
+        for key in ['town_city_district', 'state']:
+            parsed.setdefault(key, '')
         return parsed
     
     def _fallback_address_parse(self, address):
         """Fallback address parsing without API"""
-        import re
-        
         # Extract PIN code
-        pin_match = re.search(r'\b\d{6}\b', address)
+        pin_match = PIN_CODE.search(address)
         pin_code = pin_match.group() if pin_match else ""
         
         # Extract flat/door/block number (look for standalone numbers)
@@ -159,15 +749,15 @@ Return only valid JSON:
         # Simple address splitting
         parts = [part.strip() for part in address.split(',') if part.strip()]
         
-        return {
+        return self._fill_location({
             "flat_door_block_no": flat_no,
             "premises_building_village": parts[1] if len(parts) > 1 else "",
             "road_street_post_office": parts[2] if len(parts) > 2 else "",
             "area_locality": parts[3] if len(parts) > 3 else "",
-            "town_city_district": "",  # Leave empty for invalid data
-            "state": "",  # Leave empty for invalid data
+            "town_city_district": "",  # Filled from the PIN directory when known
+            "state": "",
             "pin_code": pin_code
-        }
+        })
 
 def test_parser():
     """Test the parser with sample data"""
@@ -181,5 +771,9 @@ def test_parser():
     address_result = parser.parse_address("DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093, help uldal gov In")
     print("Address parsing result:", address_result)
 
+    # Test combined parsing, as used by the Excel filler
+    combined_result = parser.parse_name_and_address("Anjali Kumari", "DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093")
+    print("Combined parsing result:", combined_result)
+
 if __name__ == "__main__":
     test_parser()
\ No newline at end of file
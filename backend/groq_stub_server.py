@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Groq chat-completions API
+Usage: python groq_stub_server.py [port]
+
+Point the backend at it with
+GROQ_BASE_URL=http://127.0.0.1:<port>/openai/v1/chat/completions
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+from address_parser import parse_address_rules
+
+load_dotenv()
+
+CHAT_PATH = '/openai/v1/chat/completions'
+NUMBERED_ITEM = re.compile(r'^(\d+): (.+)$', re.MULTILINE)
+PROMPT_FIELD = re.compile(r'^(Name|Address): (.+)$', re.MULTILINE)
+
+def sample_latency(distribution, latency_ms, sigma, rng):
+    """One response delay in seconds
+
+    "fixed" always waits latency_ms, "uniform" draws from 0 to twice latency_ms,
+    "exponential" has mean latency_ms, and "lognormal" has median latency_ms with a
+    tail set by sigma.
+    """
+    if distribution == 'fixed':
+        delay = latency_ms
+    elif distribution == 'uniform':
+        delay = rng.uniform(0, 2 * latency_ms)
+    elif distribution == 'exponential':
+        delay = rng.expovariate(1 / latency_ms) if latency_ms > 0 else 0
+    elif distribution == 'lognormal':
+        delay = latency_ms * rng.lognormvariate(0, sigma)
+    else:
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+    return delay / 1000
+
+def _parse_name(full_name):
+    parts = full_name.split()
+    if len(parts) < 2:
+        return {"first_name": full_name.strip(), "middle_name": "", "last_name": ""}
+    return {"first_name": parts[0], "middle_name": " ".join(parts[1:-1]), "last_name": parts[-1]}
+
+def _parse_address(address):
+    return parse_address_rules(address)[0]
+
+def generate_content(prompt):
+    """A plausible answer to each prompt GroqParser sends, from the local parsers"""
+    first_line = prompt.strip().split('\n', 1)[0]
+    if first_line.startswith('Parse each numbered'):
+        parse = _parse_name if 'name' in first_line else _parse_address
+        # The example in the prompt is not numbered, so every match is an item
+        return json.dumps({index: parse(item) for index, item in NUMBERED_ITEM.findall(prompt)})
+
+    fields = dict(PROMPT_FIELD.findall(prompt.split('Example', 1)[0]))
+    if 'Name' in fields and 'Address' in fields:
+        return json.dumps({'name': _parse_name(fields['Name']), 'address': _parse_address(fields['Address'])})
+    if 'Name' in fields:
+        return json.dumps(_parse_name(fields['Name']))
+    if 'Address' in fields:
+        return json.dumps(_parse_address(fields['Address']))
+    return "{}"
+
+def load_canned_responses(path):
+    """[{"match": <substring of the prompt>, "content": <reply>}, ...] from a JSON file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class StubConfig:
+    """Behaviour of the stub; defaults come from GROQ_STUB_* environment variables"""
+
+    def __init__(self, latency_ms=None, latency_distribution=None, latency_sigma=None, error_rate=None,
+                 error_status=None, hang_rate=None, hang_seconds=None, responses=None, seed=None):
+        env = os.getenv
+        self.latency_ms = float(env('GROQ_STUB_LATENCY_MS', '50') if latency_ms is None else latency_ms)
+        self.latency_distribution = latency_distribution or env('GROQ_STUB_LATENCY_DIST', 'fixed')
+        self.latency_sigma = float(env('GROQ_STUB_LATENCY_SIGMA', '0.5') if latency_sigma is None else latency_sigma)
+        self.error_rate = float(env('GROQ_STUB_ERROR_RATE', '0') if error_rate is None else error_rate)
+        self.error_status = int(env('GROQ_STUB_ERROR_STATUS', '503') if error_status is None else error_status)
+        self.hang_rate = float(env('GROQ_STUB_HANG_RATE', '0') if hang_rate is None else hang_rate)
+        self.hang_seconds = float(env('GROQ_STUB_HANG_SECONDS', '30') if hang_seconds is None else hang_seconds)
+        if responses is None and env('GROQ_STUB_RESPONSES'):
+            responses = load_canned_responses(env('GROQ_STUB_RESPONSES'))
+        # Canned replies may be given as JSON values; the API always sends text
+        self.responses = [
+            dict(response, content=response['content'] if isinstance(response.get('content'), str)
+                 else json.dumps(response.get('content')))
+            for response in responses or []
+        ]
+        if seed is None and env('GROQ_STUB_SEED'):
+            seed = int(env('GROQ_STUB_SEED'))
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def draw(self):
+        """(roll, delay) for the next request, from the seeded generator"""
+        with self.lock:
+            self.requests += 1
+            roll = self.rng.random()
+            delay = sample_latency(self.latency_distribution, self.latency_ms, self.latency_sigma, self.rng)
+        return roll, delay
+
+    def content_for(self, prompt):
+        for response in self.responses:
+            if response.get('match', '') in prompt:
+                return response['content']
+        return generate_content(prompt)
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; avoid Nagle stalls on kept-alive connections
+        disable_nagle_algorithm = True
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            try:
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client timed out or hedged elsewhere and closed the connection
+                self.close_connection = True
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b'{}')
+                prompt = request['messages'][-1]['content']
+            except (ValueError, KeyError, IndexError, TypeError):
+                self._send(400, {"error": {"message": "Expected a chat-completions request"}})
+                return
+            if self.path.split('?', 1)[0] != CHAT_PATH:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            roll, delay = config.draw()
+            if roll < config.hang_rate:
+                time.sleep(config.hang_seconds)
+            time.sleep(delay)
+            if roll < config.hang_rate + config.error_rate:
+                headers = {'Retry-After': '0'} if config.error_status == 429 else None
+                self._send(config.error_status, {"error": {"message": "Stub error"}}, headers)
+                return
+            self._send(200, {
+                "id": f"stub-{config.requests}",
+                "object": "chat.completion",
+                "model": request.get('model', 'stub'),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": config.content_for(prompt)},
+                    "finish_reason": "stop"
+                }]
+            })
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+def start_stub_server(host='127.0.0.1', port=0, config=None, **options):
+    """Serve the stub on a background thread; returns (server, url)
+
+    Keyword options are passed to StubConfig when no config is given.
+    """
+    config = config or StubConfig(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}{CHAT_PATH}"
+
+def main():
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and not sys.argv[1].isdigit()):
+        print(__doc__.strip())
+        sys.exit(1)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv('GROQ_STUB_PORT', '8800'))
+    server, url = start_stub_server(host=os.getenv('GROQ_STUB_HOST', '127.0.0.1'), port=port)
+    config = server.config
+    print(f"Groq stub listening on {url} ({config.latency_distribution} latency {config.latency_ms:g} ms, "
+          f"{config.error_rate:.0%} errors, {config.hang_rate:.0%} hangs, {len(config.responses)} canned responses)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
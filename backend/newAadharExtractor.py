@@ -195,23 +195,19 @@ class aadharExtractor:
     def process_pdf(self, pdf_path):
         """Try to extract text directly, fallback to OCR"""
         import fitz
-        from PIL import Image
-        import io, os
+        from ocr_engine import pixmap_to_array
         text = ''
         with fitz.open(pdf_path) as doc:
             for page in doc:
                 text += page.get_text() + "\n"
-        if len(text.strip()) > 50:
-            return text
-        print("Direct extraction failed, using OCR...")
-        reader = self.get_ocr_reader()
-        for i, page in enumerate(fitz.open(pdf_path)):
-            pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))
-            img = Image.open(io.BytesIO(pix.tobytes("png")))
-            temp = f"temp_{i}.png"
-            img.save(temp)
-            text += "\n".join(reader.readtext(temp, detail=0)) + "\n"
-            os.remove(temp)
+            if len(text.strip()) > 50:
+                return text
+            print("Direct extraction failed, using OCR...")
+            reader = self.get_ocr_reader()
+            for page in doc:
+                # Hand the rendered pixels straight to EasyOCR, no temp PNG on disk
+                pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))
+                text += "\n".join(reader.readtext(pixmap_to_array(pix), detail=0)) + "\n"
         return text
 
     def extract_from_file(self, file_path):
@@ -0,0 +1,543 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_LANGUAGES = ('en',)
+
+# CPU inference profiles: intra-op torch threads (None keeps torch's default),
+# dynamic int8 quantization of the detector and recognizer, and how many text
+# boxes the recognizer processes per batch
+OCR_PROFILES = {
+    'default': {'torch_threads': None, 'quantize': True, 'batch_size': 1},
+    # One request at a time on a small instance: all cores on each page
+    'latency': {'torch_threads': os.cpu_count() or 1, 'quantize': True, 'batch_size': 16},
+    # Full-precision weights, for deployments that can trade latency for accuracy
+    'accuracy': {'torch_threads': None, 'quantize': False, 'batch_size': 1}
+}
+
+def get_inference_profile(name=None):
+    """The configured OCR inference profile, with per-setting environment overrides"""
+    name = (name or os.getenv('OCR_PROFILE', 'default')).lower()
+    if name not in OCR_PROFILES:
+        print(f"Unknown OCR profile {name}, using default")
+        name = 'default'
+    profile = dict(OCR_PROFILES[name], name=name)
+    if os.getenv('OCR_TORCH_THREADS'):
+        profile['torch_threads'] = int(os.getenv('OCR_TORCH_THREADS'))
+    if os.getenv('OCR_QUANTIZE'):
+        profile['quantize'] = os.getenv('OCR_QUANTIZE').lower() == 'true'
+    if os.getenv('OCR_BATCH_SIZE'):
+        profile['batch_size'] = int(os.getenv('OCR_BATCH_SIZE'))
+    return profile
+
+class OCRReaderRegistry:
+    """Process-wide EasyOCR readers, loaded once and shared by all request threads"""
+
+    def __init__(self, profile=None):
+        self.profile = profile or get_inference_profile()
+        self.readers = {}
+        self.reader_locks = {}
+        self.load_seconds = {}
+        self.lock = threading.Lock()
+
+    def _key(self, languages, gpu):
+        return (tuple(languages), gpu)
+
+    def _load(self, languages, gpu):
+        import easyocr
+        os.environ.setdefault('EASYOCR_MODULE_PATH', os.path.expanduser('~/.EasyOCR'))
+        if self.profile['torch_threads'] and not gpu:
+            import torch
+            torch.set_num_threads(self.profile['torch_threads'])
+        start = time.perf_counter()
+        reader = easyocr.Reader(list(languages), gpu=gpu, verbose=False, download_enabled=False,
+                                quantize=self.profile['quantize'])
+        self.load_seconds[self._key(languages, gpu)] = round(time.perf_counter() - start, 3)
+        return reader
+
+    def get_reader(self, languages=DEFAULT_LANGUAGES, gpu=False):
+        """Return the shared reader, loading the model on first use"""
+        key = self._key(languages, gpu)
+        reader = self.readers.get(key)
+        if reader is not None:
+            return reader
+        with self.lock:
+            if key not in self.readers:
+                print(f"Loading EasyOCR model for {', '.join(languages)}...")
+                reader = self._load(languages, gpu)
+                # The lock must exist before the reader is visible to the lock-free fast path
+                self.reader_locks[key] = threading.Lock()
+                self.readers[key] = reader
+            return self.readers[key]
+
+    def readtext(self, image, languages=DEFAULT_LANGUAGES, gpu=False, **kwargs):
+        """Run OCR on an image with the shared reader
+
+        Inference is serialized per reader, since EasyOCR readers are not
+        documented as safe for concurrent use.
+        """
+        reader = self.get_reader(languages, gpu)
+        kwargs.setdefault('batch_size', self.profile['batch_size'])
+        with self.reader_locks[self._key(languages, gpu)]:
+            return reader.readtext(image, **kwargs)
+
+    def readtext_batched(self, images, languages=DEFAULT_LANGUAGES, gpu=False, **kwargs):
+        """Run OCR on a list of same-sized images in one detector pass, returning one result per image"""
+        reader = self.get_reader(languages, gpu)
+        kwargs.setdefault('batch_size', self.profile['batch_size'])
+        with self.reader_locks[self._key(languages, gpu)]:
+            return reader.readtext_batched(images, **kwargs)
+
+    def preload(self, languages=DEFAULT_LANGUAGES, gpu=False):
+        """Load a reader ahead of the first request; returns True if it is ready"""
+        try:
+            self.get_reader(languages, gpu)
+            return True
+        except ImportError:
+            print("EasyOCR not installed. Please install: pip install easyocr")
+        except Exception as e:
+            print(f"EasyOCR preload error: {e}")
+        return False
+
+    def is_warm(self, languages=DEFAULT_LANGUAGES, gpu=False):
+        return self._key(languages, gpu) in self.readers
+
+    def status(self):
+        return {
+            'warm': bool(self.readers),
+            'profile': self.profile,
+            'readers': [
+                {'languages': list(languages), 'gpu': gpu, 'load_seconds': self.load_seconds.get((languages, gpu))}
+                for languages, gpu in self.readers
+            ]
+        }
+
+def pixmap_to_array(pix):
+    """Wrap a rendered PyMuPDF pixmap's samples as an HxWx3 uint8 RGB array, without PNG encoding"""
+    import numpy as np
+    image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride // pix.n, pix.n)
+    image = image[:, :pix.width, :]
+    if pix.alpha:
+        image = image[:, :, :3]
+    return image
+
+class OCRResultCache:
+    """LRU cache of OCR results keyed by a hash of the rendered image and the OCR settings
+
+    The same card is often uploaded again in a later session, and re-rendering it
+    gives byte-identical pixels, so its OCR result can be reused.
+    """
+
+    def __init__(self, max_entries=None):
+        if max_entries is None:
+            max_entries = int(os.getenv('OCR_CACHE_MAX_ENTRIES', '256'))
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, image, languages, kwargs):
+        """Cache key for an image array or encoded image bytes, or None if it cannot be hashed"""
+        digest = hashlib.blake2b(digest_size=20)
+        if isinstance(image, (bytes, bytearray)):
+            digest.update(image)
+        elif hasattr(image, 'shape'):
+            digest.update(repr((image.shape, str(image.dtype))).encode())
+            digest.update(image.data if image.flags['C_CONTIGUOUS'] else image.tobytes())
+        else:
+            return None
+        digest.update(repr((tuple(languages), sorted(kwargs.items()))).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+def parse_core_list(value):
+    """Parse a core list such as "0-3" or "0,2,4" into a list of CPU ids"""
+    cores = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+# State of an OCR worker process
+_worker_registry = None
+_worker_error = None
+
+def _init_worker(languages, cores, torch_threads, worker_counter, ready_counter, failed_counter):
+    """Pin the worker to its core and load its own EasyOCR model"""
+    global _worker_registry, _worker_error
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    if cores and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {cores[worker_index % len(cores)]})
+        except OSError as e:
+            print(f"OCR worker {worker_index} could not be pinned: {e}")
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    try:
+        # Worker threads come from OCR_WORKER_THREADS, not the profile
+        registry = OCRReaderRegistry(dict(get_inference_profile(), torch_threads=None))
+        registry.get_reader(languages)
+        _worker_registry = registry
+        with ready_counter.get_lock():
+            ready_counter.value += 1
+    except Exception as e:
+        _worker_error = str(e)
+        with failed_counter.get_lock():
+            failed_counter.value += 1
+        print(f"OCR worker {worker_index} failed to load EasyOCR: {e}")
+
+def _worker_readtext(image, languages, kwargs):
+    if _worker_registry is None:
+        raise RuntimeError(f"OCR worker not ready: {_worker_error}")
+    return _worker_registry.readtext(image, languages, **kwargs)
+
+class OCRWorkerPool:
+    """Pool of OCR worker processes, each pinned to a core with a preloaded model
+
+    EasyOCR inference keeps a request thread busy for seconds, so concurrent scans
+    in one process just contend. Workers run in separate processes and requests
+    wait in a bounded queue, failing fast instead of piling up when it is full.
+    """
+
+    def __init__(self, workers=None, cores=None, queue_size=None, torch_threads=None, languages=DEFAULT_LANGUAGES):
+        if cores is None:
+            cores = parse_core_list(os.getenv('OCR_WORKER_CORES', ''))
+        if workers is None:
+            workers = int(os.getenv('OCR_WORKERS', '0')) or len(cores) or os.cpu_count() or 1
+        if queue_size is None:
+            queue_size = int(os.getenv('OCR_QUEUE_SIZE', str(2 * workers)))
+        if torch_threads is None:
+            torch_threads = int(os.getenv('OCR_WORKER_THREADS', '1'))
+        self.workers = workers
+        self.cores = cores
+        self.languages = tuple(languages)
+        self.queue_timeout = float(os.getenv('OCR_QUEUE_TIMEOUT', '30'))
+        # A task lost with a crashed worker is never completed, so results are awaited with a bound
+        self.task_timeout = float(os.getenv('OCR_TASK_TIMEOUT', '120'))
+        # Requests running on a worker plus requests waiting for one
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.queue_size = queue_size
+        context = multiprocessing.get_context('spawn')
+        self.ready_counter = context.Value('i', 0)
+        self.failed_counter = context.Value('i', 0)
+        self.pool = context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self.languages, cores, torch_threads, context.Value('i', 0),
+                      self.ready_counter, self.failed_counter)
+        )
+
+    def readtext(self, image, **kwargs):
+        """Run OCR on a worker process, blocking until the result is ready"""
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise RuntimeError("OCR queue is full")
+        try:
+            task = self.pool.apply_async(_worker_readtext, (image, self.languages, kwargs))
+            try:
+                return task.get(timeout=self.task_timeout)
+            except multiprocessing.TimeoutError:
+                raise RuntimeError(f"OCR worker did not answer within {self.task_timeout:.0f}s")
+        finally:
+            self.slots.release()
+
+    def ready_workers(self):
+        return self.ready_counter.value
+
+    def started_workers(self):
+        """Workers that finished loading their model, successfully or not"""
+        return self.ready_counter.value + self.failed_counter.value
+
+    def status(self):
+        return {
+            'backend': 'process',
+            'workers': self.workers,
+            'ready_workers': self.ready_workers(),
+            'failed_workers': self.failed_counter.value,
+            'cores': self.cores,
+            'queue_size': self.queue_size,
+            'profile': get_inference_profile()
+        }
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+class OCRBatcher:
+    """Micro-batches OCR requests from concurrent request threads
+
+    Requests arriving within OCR_BATCH_WINDOW_MS of each other are grouped by their
+    readtext settings, padded with white to a common size and run through EasyOCR's
+    batched detector, then each caller gets its own result back. Padding only extends
+    the right and bottom edges, so box coordinates are unchanged. Images are only
+    batched together while each one, padded, stays under OCR_BATCH_PAD_LIMIT times its
+    own pixels, so a small crop never rides along with a full page.
+    """
+
+    def __init__(self, registry, window_ms=None, max_images=None, pad_limit=None):
+        if window_ms is None:
+            window_ms = float(os.getenv('OCR_BATCH_WINDOW_MS', '5'))
+        if max_images is None:
+            max_images = int(os.getenv('OCR_BATCH_MAX_IMAGES', '8'))
+        if pad_limit is None:
+            pad_limit = float(os.getenv('OCR_BATCH_PAD_LIMIT', '1.5'))
+        self.registry = registry
+        self.window_seconds = window_ms / 1000
+        self.max_images = max_images
+        self.pad_limit = pad_limit
+        self.pending = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.metrics = {'batches': 0, 'images': 0, 'largest_batch': 0, 'queue_wait_ms': 0.0}
+
+    def readtext(self, image, **kwargs):
+        """Queue an image for the next batch and block until its result is ready"""
+        if not hasattr(image, 'shape'):
+            return self.registry.readtext(image, **kwargs)
+        self.start()
+        request = {
+            'image': image,
+            'kwargs': kwargs,
+            'group': (repr(sorted(kwargs.items())), image.shape[2:], str(image.dtype)),
+            'queued_at': time.perf_counter(),
+            'done': threading.Event(),
+            'result': None,
+            'error': None
+        }
+        with self.condition:
+            self.pending.append(request)
+            self.condition.notify()
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def _collect(self):
+        """Wait for a request, then keep the window open for more"""
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            deadline = time.perf_counter() + self.window_seconds
+            while len(self.pending) < self.max_images:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            requests, self.pending = self.pending, []
+            return requests
+
+    def _batches(self, requests):
+        """Split requests into batches with the same settings and little padding"""
+        groups = {}
+        for request in requests:
+            groups.setdefault(request['group'], []).append(request)
+        for group in groups.values():
+            group.sort(key=lambda r: r['image'].shape[0] * r['image'].shape[1], reverse=True)
+            batch = []
+            for request in group:
+                candidate = batch + [request]
+                height = max(r['image'].shape[0] for r in candidate)
+                width = max(r['image'].shape[1] for r in candidate)
+                # Every image is padded to height x width, so check the smallest one
+                smallest = min(r['image'].shape[0] * r['image'].shape[1] for r in candidate)
+                if batch and (len(candidate) > self.max_images
+                              or height * width > self.pad_limit * smallest):
+                    yield batch
+                    candidate = [request]
+                batch = candidate
+            if batch:
+                yield batch
+
+    def _run(self, batch):
+        import numpy as np
+        kwargs = dict(batch[0]['kwargs'])
+        if len(batch) == 1:
+            return [self.registry.readtext(batch[0]['image'], **kwargs)]
+        height = max(r['image'].shape[0] for r in batch)
+        width = max(r['image'].shape[1] for r in batch)
+        images = []
+        for request in batch:
+            image = request['image']
+            padded = np.full((height, width) + image.shape[2:], 255, dtype=image.dtype)
+            padded[:image.shape[0], :image.shape[1]] = image
+            images.append(padded)
+        return self.registry.readtext_batched(images, **kwargs)
+
+    def _loop(self):
+        while True:
+            requests = self._collect()
+            for batch in self._batches(requests):
+                started = time.perf_counter()
+                try:
+                    results = self._run(batch)
+                    for request, result in zip(batch, results):
+                        request['result'] = result
+                except Exception as e:
+                    for request in batch:
+                        request['error'] = e
+                self.metrics['batches'] += 1
+                self.metrics['images'] += len(batch)
+                self.metrics['largest_batch'] = max(self.metrics['largest_batch'], len(batch))
+                self.metrics['queue_wait_ms'] += sum((started - r['queued_at']) * 1000 for r in batch)
+                for request in batch:
+                    request['done'].set()
+
+    def start(self):
+        with self.condition:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._loop, name="ocr-batcher", daemon=True)
+            self.thread.start()
+
+    def status(self):
+        images = self.metrics['images']
+        return dict(
+            self.registry.status(),
+            backend='batch',
+            window_ms=self.window_seconds * 1000,
+            max_images=self.max_images,
+            batches=self.metrics['batches'],
+            images=images,
+            largest_batch=self.metrics['largest_batch'],
+            mean_batch_size=round(images / self.metrics['batches'], 2) if self.metrics['batches'] else 0.0,
+            mean_queue_wait_ms=round(self.metrics['queue_wait_ms'] / images, 2) if images else 0.0
+        )
+
+_registry = OCRReaderRegistry()
+_result_cache = OCRResultCache()
+_batcher = OCRBatcher(_registry)
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_ocr_registry():
+    """Process-wide OCR reader registry"""
+    return _registry
+
+def use_worker_pool():
+    return os.getenv('OCR_BACKEND', 'thread').lower() == 'process'
+
+def use_batcher():
+    return os.getenv('OCR_BACKEND', 'thread').lower() == 'batch'
+
+def get_batcher():
+    """Process-wide OCR micro-batcher over the shared reader"""
+    return _batcher
+
+def get_worker_pool():
+    """Process-wide OCR worker pool, started on first use"""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = OCRWorkerPool()
+        return _worker_pool
+
+def start_ocr_backend():
+    """Preload the configured OCR backend; returns True if it can serve requests"""
+    if use_worker_pool():
+        pool = get_worker_pool()
+        deadline = time.time() + float(os.getenv('OCR_PRELOAD_TIMEOUT', '120'))
+        while pool.started_workers() < pool.workers and time.time() < deadline:
+            time.sleep(0.2)
+        return pool.ready_workers() > 0
+    if use_batcher():
+        _batcher.start()
+    return _registry.preload()
+
+def ocr_ready():
+    """Check the OCR backend is usable, loading the in-process reader if needed"""
+    if use_worker_pool():
+        pool = get_worker_pool()
+        # Give workers that are still loading their model a chance before giving up
+        deadline = time.time() + pool.queue_timeout
+        while pool.ready_workers() == 0 and pool.started_workers() < pool.workers and time.time() < deadline:
+            time.sleep(0.2)
+        return pool.ready_workers() > 0
+    return _registry.preload()
+
+def get_result_cache():
+    """Process-wide OCR result cache"""
+    return _result_cache
+
+def use_result_cache():
+    return os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+
+def _readtext_uncached(image, **kwargs):
+    if use_worker_pool():
+        return get_worker_pool().readtext(image, **kwargs)
+    if use_batcher():
+        return _batcher.readtext(image, **kwargs)
+    return _registry.readtext(image, **kwargs)
+
+def readtext(image, **kwargs):
+    """Run OCR through the configured backend (in-process reader or worker pool), reusing cached results"""
+    # Quantized and full-precision models can read the same image differently
+    config = dict(kwargs, quantize=_registry.profile['quantize'])
+    key = _result_cache.key(image, DEFAULT_LANGUAGES, config) if use_result_cache() else None
+    if key is None:
+        return _readtext_uncached(image, **kwargs)
+    result = _result_cache.get(key)
+    if result is None:
+        result = _readtext_uncached(image, **kwargs)
+        _result_cache.put(key, result)
+    return result
+
+def ocr_status():
+    if use_worker_pool():
+        status = get_worker_pool().status() if _worker_pool is not None else {'backend': 'process', 'workers': 0}
+    elif use_batcher():
+        status = _batcher.status()
+    else:
+        status = dict(_registry.status(), backend='thread')
+    if use_result_cache():
+        status['result_cache'] = _result_cache.get_stats()
+    return status
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PIN_CODE = re.compile(r'\b(\d{6})\b')
+SEPARATORS = re.compile(r'[\s,.;:/\\()\-]+')
+
+def normalize_name(full_name):
+    """Cache key for a name: case-folded with punctuation and runs of whitespace collapsed"""
+    return SEPARATORS.sub(' ', (full_name or '').casefold()).strip()
+
+def normalize_address(address):
+    """Cache key for an address, anchored on its PIN code
+
+    The PIN code is pulled to the front, so the same address written with the PIN in
+    another place, different case, punctuation or spacing maps to one key, while
+    addresses in different PIN areas can never share an entry.
+    """
+    address = (address or '').casefold()
+    match = PIN_CODE.search(address)
+    pin_code = match.group(1) if match else ''
+    if match:
+        address = address[:match.start()] + ' ' + address[match.end():]
+    return f"{pin_code}|{SEPARATORS.sub(' ', address).strip()}"
+
+NORMALIZERS = {'name': normalize_name, 'address': normalize_address}
+
+class ParseCache:
+    """Two-tier cache of Groq name/address parses: an in-process LRU over a SQLite file
+
+    Entries expire after PARSE_CACHE_TTL_HOURS in both tiers. Only API results that
+    passed GroqParser's schema check are stored, never the local fallback parses.
+    """
+
+    def __init__(self, db_path=None, memory_entries=None, ttl_hours=None):
+        if db_path is None:
+            db_path = os.getenv('PARSE_CACHE_DB', 'taxes_files/.parse_cache.sqlite3')
+        if memory_entries is None:
+            memory_entries = int(os.getenv('PARSE_CACHE_MEMORY_ENTRIES', '1024'))
+        if ttl_hours is None:
+            ttl_hours = float(os.getenv('PARSE_CACHE_TTL_HOURS', str(30 * 24)))
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS parses ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        self.db.commit()
+        self.metrics = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'expired': 0}
+
+    def _remember(self, cache_key, value, created_at):
+        self.memory[cache_key] = (value, created_at)
+        self.memory.move_to_end(cache_key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, kind, raw):
+        """Cached parse for a raw name or address, or None"""
+        key = NORMALIZERS[kind](raw)
+        cache_key = (kind, key)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(cache_key)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self.memory.move_to_end(cache_key)
+                self.metrics['memory_hits'] += 1
+                return dict(entry[0])
+            if entry:
+                del self.memory[cache_key]
+
+            row = self.db.execute(
+                "SELECT value, created_at FROM parses WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                value = json.loads(row[0])
+                self._remember(cache_key, value, row[1])
+                self.metrics['disk_hits'] += 1
+                return dict(value)
+            if row:
+                self.db.execute("DELETE FROM parses WHERE kind = ? AND key = ?", (kind, key))
+                self.db.commit()
+                self.metrics['expired'] += 1
+            self.metrics['misses'] += 1
+            return None
+
+    def put(self, kind, raw, value):
+        key = NORMALIZERS[kind](raw)
+        now = time.time()
+        with self.lock:
+            self._remember((kind, key), dict(value), now)
+            self.db.execute(
+                "INSERT OR REPLACE INTO parses (kind, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), now)
+            )
+            self.db.commit()
+            self.metrics['stores'] += 1
+
+    def purge_expired(self):
+        """Delete expired entries from the SQLite tier; returns how many were removed"""
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM parses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.db.commit()
+            return cursor.rowcount
+
+    def get_stats(self):
+        with self.lock:
+            hits = self.metrics['memory_hits'] + self.metrics['disk_hits']
+            lookups = hits + self.metrics['misses']
+            disk_entries = self.db.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+            return dict(
+                self.metrics,
+                memory_entries=len(self.memory),
+                disk_entries=disk_entries,
+                hit_rate=round(hits / lookups, 3) if lookups else 0.0
+            )
+
+_parse_cache = None
+_lock = threading.Lock()
+
+def parse_cache_enabled():
+    return os.getenv('PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+def get_parse_cache():
+    """Process-wide parse cache, or None when disabled"""
+    global _parse_cache
+    if not parse_cache_enabled():
+        return None
+    with _lock:
+        if _parse_cache is None:
+            _parse_cache = ParseCache()
+            # Expired rows are otherwise only dropped when looked up again
+            _parse_cache.purge_expired()
+        return _parse_cache
@@ -1,6 +1,6 @@
-import boto3
 import os
 from dotenv import load_dotenv
+from aws_clients import get_client
 import json
 import fitz  # PyMuPDF
 
@@ -8,18 +8,8 @@ load_dotenv()
 
 class PassbookExtractor:
     def __init__(self):
-        self.textract = boto3.client(
-            'textract',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
-        self.s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
+        self.textract = get_client('textract')
+        self.s3 = get_client('s3')
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
 
     def extract_passbook_data(self, user_id):
@@ -1,6 +1,5 @@
-import boto3
-import os
 from dotenv import load_dotenv
+from aws_clients import get_client
 import json
 import fitz  # PyMuPDF
 
@@ -8,19 +7,15 @@ load_dotenv()
 
 class PassbookExtractorLocal:
     def __init__(self):
-        self.textract = boto3.client(
-            'textract',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
-        )
+        self.textract = get_client('textract')
 
-    def extract_passbook_data(self, pdf_path):
-        """Extract data from local PDF file"""
+    def extract_passbook_data(self, pdf_path, pdf_bytes=None):
+        """Extract data from local PDF file, or from its contents if already in memory"""
         try:
-            # Read PDF file directly
-            with open(pdf_path, 'rb') as file:
-                pdf_bytes = file.read()
+            # Read PDF file directly unless the upload is already buffered
+            if pdf_bytes is None:
+                with open(pdf_path, 'rb') as file:
+                    pdf_bytes = file.read()
             
             # Convert PDF to images using PyMuPDF
             doc = fitz.open(stream=pdf_bytes, filetype="pdf")
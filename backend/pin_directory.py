@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Offline PIN code directory
+Usage: python pin_directory.py build <pincode_csv> [index_path]
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAGIC = b'PINIDX01'
+# Magic, then the offset and length of the JSON district table
+HEADER = struct.Struct('<8sII')
+FIRST_PIN = 100000
+SLOTS = 900000
+SLOT = struct.Struct('<H')
+
+# State for the first digits of a PIN code, longest prefix first, for when the
+# full directory has not been built or does not know a PIN. Prefixes that are
+# shared by more than one state or territory map to None so no state is guessed:
+# 160 (Chandigarh/Mohali), 244/247/246/262 (Uttar Pradesh/Uttarakhand), 362 (Diu),
+# 396 (Daman, Dadra and Nagar Haveli/Valsad), 533 (Yanam), 605 (Puducherry/Villupuram),
+# 609 (Karaikal), 673 (Mahe), 682 (Lakshadweep/Kochi), 813 (Bihar/Jharkhand).
+PIN_PREFIX_STATES = {
+    '11': 'Delhi', '12': 'Haryana', '13': 'Haryana', '14': 'Punjab', '15': 'Punjab',
+    '160': None, '16': 'Punjab', '17': 'Himachal Pradesh', '18': 'Jammu and Kashmir',
+    '194': 'Ladakh', '19': 'Jammu and Kashmir',
+    '244': None, '246': None, '247': None, '262': None,
+    '248': 'Uttarakhand', '249': 'Uttarakhand', '263': 'Uttarakhand',
+    '20': 'Uttar Pradesh', '21': 'Uttar Pradesh', '22': 'Uttar Pradesh',
+    '23': 'Uttar Pradesh', '24': 'Uttar Pradesh', '25': 'Uttar Pradesh', '26': 'Uttar Pradesh',
+    '27': 'Uttar Pradesh', '28': 'Uttar Pradesh',
+    '30': 'Rajasthan', '31': 'Rajasthan', '32': 'Rajasthan', '33': 'Rajasthan', '34': 'Rajasthan',
+    '362': None, '396': None, '36': 'Gujarat', '37': 'Gujarat', '38': 'Gujarat', '39': 'Gujarat',
+    '403': 'Goa', '40': 'Maharashtra', '41': 'Maharashtra', '42': 'Maharashtra',
+    '43': 'Maharashtra', '44': 'Maharashtra',
+    '45': 'Madhya Pradesh', '46': 'Madhya Pradesh', '47': 'Madhya Pradesh', '48': 'Madhya Pradesh',
+    '49': 'Chhattisgarh', '50': 'Telangana', '51': 'Andhra Pradesh', '52': 'Andhra Pradesh',
+    '533': None, '53': 'Andhra Pradesh',
+    '56': 'Karnataka', '57': 'Karnataka', '58': 'Karnataka', '59': 'Karnataka',
+    '605': None, '609': None, '60': 'Tamil Nadu', '61': 'Tamil Nadu', '62': 'Tamil Nadu',
+    '63': 'Tamil Nadu', '64': 'Tamil Nadu',
+    '673': None, '682': None, '67': 'Kerala', '68': 'Kerala', '69': 'Kerala',
+    '737': 'Sikkim', '744': 'Andaman and Nicobar Islands', '70': 'West Bengal', '71': 'West Bengal',
+    '72': 'West Bengal', '73': 'West Bengal', '74': 'West Bengal',
+    '75': 'Odisha', '76': 'Odisha', '77': 'Odisha', '78': 'Assam',
+    '790': 'Arunachal Pradesh', '791': 'Arunachal Pradesh', '792': 'Arunachal Pradesh',
+    '793': 'Meghalaya', '794': 'Meghalaya', '795': 'Manipur', '796': 'Mizoram',
+    '797': 'Nagaland', '798': 'Nagaland', '799': 'Tripura',
+    '813': None, '814': 'Jharkhand', '815': 'Jharkhand', '816': 'Jharkhand',
+    '822': 'Jharkhand', '825': 'Jharkhand', '826': 'Jharkhand', '827': 'Jharkhand',
+    '828': 'Jharkhand', '829': 'Jharkhand', '831': 'Jharkhand', '832': 'Jharkhand',
+    '833': 'Jharkhand', '834': 'Jharkhand', '835': 'Jharkhand',
+    '80': 'Bihar', '81': 'Bihar', '82': 'Bihar', '83': 'Bihar', '84': 'Bihar', '85': 'Bihar'
+}
+
+# Column names used by the India Post / data.gov.in directory and common exports
+PIN_COLUMNS = ['pincode', 'pin_code', 'pin']
+DISTRICT_COLUMNS = ['district', 'districtname', 'district_name']
+STATE_COLUMNS = ['statename', 'state_name', 'state']
+
+def state_for_prefix(pin_code):
+    """State from the bundled PIN prefix table, or None when unknown or shared by several states"""
+    for length in (3, 2):
+        prefix = pin_code[:length]
+        if prefix in PIN_PREFIX_STATES:
+            return PIN_PREFIX_STATES[prefix]
+    return None
+
+def _column(fieldnames, candidates):
+    normalized = {name.strip().lower(): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    raise ValueError(f"CSV has none of the columns {candidates}")
+
+def _title(value):
+    return ' '.join(word.capitalize() for word in value.strip().split())
+
+def build_index(csv_path, index_path):
+    """Build the memory-mapped index from a PIN code CSV (one row per post office)
+
+    Every PIN gets a 2-byte slot in a table covering 100000-999999 that points into
+    a district table, so a lookup is one read at a fixed offset. When post offices
+    sharing a PIN disagree, the most common district wins.
+    """
+    votes = defaultdict(Counter)
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        pin_column = _column(reader.fieldnames, PIN_COLUMNS)
+        district_column = _column(reader.fieldnames, DISTRICT_COLUMNS)
+        state_column = _column(reader.fieldnames, STATE_COLUMNS)
+        for row in reader:
+            pin_code = (row[pin_column] or '').strip()
+            if not (pin_code.isdigit() and len(pin_code) == 6):
+                continue
+            district = _title(row[district_column] or '')
+            state = _title(row[state_column] or '')
+            if district and state:
+                votes[int(pin_code)][(district, state)] += 1
+
+    districts = []
+    district_ids = {}
+    table = bytearray(SLOTS * SLOT.size)
+    for pin_code, counter in votes.items():
+        location = counter.most_common(1)[0][0]
+        if location not in district_ids:
+            districts.append(list(location))
+            district_ids[location] = len(districts)
+        SLOT.pack_into(table, (pin_code - FIRST_PIN) * SLOT.size, district_ids[location])
+
+    district_table = json.dumps(districts).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, HEADER.size + len(table), len(district_table)))
+        f.write(table)
+        f.write(district_table)
+    os.replace(temp_path, index_path)
+    return {'pin_codes': len(votes), 'districts': len(districts)}
+
+class PinDirectory:
+    """PIN code to district and state lookups from the memory-mapped index"""
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path or os.getenv('PIN_INDEX_PATH', 'data/pin_index.bin')
+        self.mm = None
+        self.districts = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, table_offset, table_length = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{self.index_path} is not a PIN index")
+            self.districts = json.loads(self.mm[table_offset:table_offset + table_length])
+        else:
+            print(f"PIN index {self.index_path} not found; districts will not be resolved from PIN codes")
+
+    def lookup(self, pin_code):
+        """Return {"district", "state"} for a PIN code, or None
+
+        Falls back to the state for the PIN prefix (with no district) when the PIN is
+        not in the index. A non-empty district means the PIN was found in the index.
+        """
+        pin_code = str(pin_code or '').strip()
+        if not (pin_code.isdigit() and len(pin_code) == 6) or pin_code[0] == '0':
+            return None
+        if self.mm is not None:
+            (district_id,) = SLOT.unpack_from(self.mm, HEADER.size + (int(pin_code) - FIRST_PIN) * SLOT.size)
+            if district_id:
+                district, state = self.districts[district_id - 1]
+                return {'district': district, 'state': state}
+        state = state_for_prefix(pin_code)
+        return {'district': '', 'state': state} if state else None
+
+    def status(self):
+        return {
+            'index': self.index_path if self.mm is not None else None,
+            'index_missing': self.mm is None,
+            'districts': len(self.districts)
+        }
+
+_directory = None
+_lock = threading.Lock()
+
+def get_pin_directory():
+    """Process-wide PIN directory, mapped on first use"""
+    global _directory
+    with _lock:
+        if _directory is None:
+            _directory = PinDirectory()
+        return _directory
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != 'build':
+        print(__doc__.strip())
+        sys.exit(1)
+    index_path = sys.argv[3] if len(sys.argv) > 3 else os.getenv('PIN_INDEX_PATH', 'data/pin_index.bin')
+    stats = build_index(sys.argv[2], index_path)
+    print(f"Indexed {stats['pin_codes']} PIN codes in {stats['districts']} districts to {index_path}")
+
+if __name__ == '__main__':
+    main()
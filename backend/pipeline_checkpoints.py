@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+class PipelineCheckpoints:
+    """Stage checkpoints for a processing session, keyed by the content hash of each stage's inputs"""
+
+    def __init__(self, checkpoint_dir):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    def hash_inputs(self, input_paths, extra=None, buffers=None):
+        """Hash input file contents (or their in-memory buffers) plus any extra stage parameters"""
+        digest = hashlib.sha256()
+        for path in input_paths:
+            path = Path(path)
+            digest.update(path.name.encode())
+            if buffers and str(path) in buffers:
+                digest.update(buffers[str(path)])
+                continue
+            if not path.exists():
+                digest.update(b'<missing>')
+                continue
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        if extra is not None:
+            digest.update(json.dumps(extra, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _checkpoint_path(self, stage):
+        return self.checkpoint_dir / f"{stage}.json"
+
+    def load(self, stage):
+        """Return the stored checkpoint for a stage, or None"""
+        path = self._checkpoint_path(stage)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_fresh(self, stage, input_hash):
+        """Return the checkpoint if it matches the input hash and its outputs still exist"""
+        checkpoint = self.load(stage)
+        if not checkpoint or checkpoint.get('input_hash') != input_hash:
+            return None
+        if not all(Path(p).exists() for p in checkpoint.get('outputs', [])):
+            return None
+        return checkpoint
+
+    def record(self, stage, input_hash, outputs, result):
+        """Write the checkpoint for a successfully completed stage"""
+        checkpoint = {
+            'stage': stage,
+            'input_hash': input_hash,
+            'outputs': [str(p) for p in outputs],
+            'result': result,
+            'completed_at': time.time()
+        }
+        path = self._checkpoint_path(stage)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_path, path)
+
+    def invalidate(self, stage):
+        """Drop the checkpoint for a stage so it re-runs on the next pass"""
+        path = self._checkpoint_path(stage)
+        if path.exists():
+            path.unlink()
+
+    def status(self):
+        """Summary of completed stages for this session"""
+        return {
+            path.stem: self.load(path.stem)
+            for path in sorted(self.checkpoint_dir.glob('*.json'))
+        }
@@ -1,9 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import os
-import tempfile
 from pathlib import Path
 from document_processor import DocumentProcessor
+import importlib
 import uuid
 from werkzeug.serving import WSGIRequestHandler
 
@@ -17,6 +16,10 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 # Store active sessions
 active_sessions = {}
 
+def forget_session(session_id):
+    """Drop a session evicted by the janitor from the active sessions"""
+    active_sessions.pop(session_id, None)
+
 @app.route('/process-documents', methods=['POST', 'OPTIONS'])
 def process_documents():
     # Handle preflight OPTIONS request
@@ -57,26 +60,11 @@ def process_documents():
         # Store processor in active sessions
         active_sessions[session_id] = processor
 
-        # Create temporary files
-        temp_dir = tempfile.mkdtemp()
-        temp_aadhar = os.path.join(temp_dir, 'temp_aadhar.pdf')
-        temp_passbook = os.path.join(temp_dir, 'temp_passbook.pdf')
-        temp_form16 = os.path.join(temp_dir, 'temp_form16.pdf')
-
-        # Save uploaded files temporarily
-        aadhar_file.save(temp_aadhar)
-        passbook_file.save(temp_passbook)
-        form16_file.save(temp_form16)
-
-        # Process documents
+        # Stream uploads straight into the session directory
         print(f"Processing documents for session: {session_id}")
-        result = processor.process_documents(temp_aadhar, temp_passbook, temp_form16, email, mobile_no)
+        result = processor.process_uploads(aadhar_file, passbook_file, form16_file, email, mobile_no)
         print(f"Processing completed with status: {result.get('status', 'unknown')}")
 
-        # Clean up temporary files
-        import shutil
-        shutil.rmtree(temp_dir)
-
         if result.get('status') == 'success':
             response_data = {
                 'success': True,
@@ -89,6 +77,10 @@ def process_documents():
                 'redirect_to': f'/output.html?session={session_id}',
                 'contact_info': {'email': email, 'mobile_no': mobile_no}
             }
+            if result.get('failed_stages'):
+                # Partial Excel: report the failed stages so the client can resume them
+                response_data.update(message=result['message'], failed_stages=result['failed_stages'],
+                                     resumable=True)
             print(f"Sending success response: {response_data}")
             response = jsonify(response_data)
             response.headers['Access-Control-Allow-Origin'] = '*'
@@ -98,6 +90,15 @@ def process_documents():
             # Clean up failed session
             error_msg = result.get('message', 'Unknown processing error')
             print(f"Processing failed: {error_msg}")
+            if processor.has_uploads():
+                # Keep the uploads and completed stages so the client can resume
+                return jsonify({
+                    'success': False,
+                    'message': error_msg,
+                    'session_id': session_id,
+                    'resumable': True,
+                    'failed_stages': result.get('failed_stages', {})
+                }), 500
             processor.cleanup_session()
             active_sessions.pop(session_id, None)
             return jsonify({
@@ -114,6 +115,61 @@ def process_documents():
             'message': f'Error processing documents: {str(e)}'
         }), 500
 
+@app.route('/resume-processing', methods=['POST'])
+def resume_processing():
+    try:
+        data = request.get_json(silent=True) or request.form
+        session_id = data.get('session_id', '')
+        email = data.get('email', '')
+        mobile_no = data.get('mobile_no', '')
+
+        try:
+            session_id = str(uuid.UUID(session_id))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Valid session_id required'}), 400
+
+        if not Path(f'taxes_files/{session_id}/uploads').exists():
+            return jsonify({'success': False, 'message': 'Session not found'}), 404
+
+        processor = active_sessions.get(session_id) or DocumentProcessor(session_id=session_id)
+        active_sessions[session_id] = processor
+
+        result = processor.resume(email, mobile_no)
+        if result.get('status') != 'success':
+            return jsonify({
+                'success': False,
+                'message': result.get('message', 'Unknown processing error'),
+                'session_id': session_id,
+                'resumable': processor.has_uploads(),
+                'failed_stages': result.get('failed_stages', {})
+            }), 500
+
+        response_data = {
+            'success': True,
+            'message': 'Documents processed successfully',
+            'session_id': session_id,
+            'extraction_results': result.get('extraction_results', {}),
+            'parsing_results': result.get('parsing_results', {}),
+            'excel_result': result.get('excel_result', {}),
+            'output_files': result.get('output_files', {}),
+            'redirect_to': f'/output.html?session={session_id}',
+            'contact_info': {'email': email, 'mobile_no': mobile_no}
+        }
+        if result.get('failed_stages'):
+            response_data.update(message=result['message'], failed_stages=result['failed_stages'], resumable=True)
+        response = jsonify(response_data)
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    except Exception as e:
+        print(f"Resume error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': f'Error resuming processing: {str(e)}'
+        }), 500
+
 @app.route('/download-excel', methods=['GET'])
 def download_excel():
     try:
@@ -154,9 +210,38 @@ def download_excel():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# Health report section -> (module, process-wide instance, method returning its status)
+HEALTH_SUBSYSTEMS = {
+    'document_cache': ('document_cache', '_document_cache', 'get_stats'),
+    'session_janitor': ('session_janitor', '_janitor', 'get_stats'),
+    'groq_circuit': ('groq_parser', '_breaker', 'status'),
+    'parse_cache': ('parse_cache', '_parse_cache', 'get_stats'),
+    'pin_directory': ('pin_directory', '_directory', 'status'),
+    'template_cache': ('template_cache', '_template_cache', 'get_stats')
+}
+
+def _health_section(name, report):
+    """One subsystem's health report, or an error string so one failure cannot fail the probe"""
+    try:
+        return report()
+    except Exception as e:
+        print(f"Health check error in {name}: {e}")
+        return f"error: {e}"
+
+def _subsystem_status(module_name, attribute, method):
+    """Status of a process-wide subsystem, or None if nothing has created it yet"""
+    instance = getattr(importlib.import_module(module_name), attribute)
+    return getattr(instance, method)() if instance is not None else None
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    response = jsonify({'status': 'healthy'})
+    # Only report subsystems already in use; the probe never creates them
+    report = {'status': 'healthy'}
+    for name, (module_name, attribute, method) in HEALTH_SUBSYSTEMS.items():
+        report[name] = _health_section(name, lambda: _subsystem_status(module_name, attribute, method))
+    report['ocr'] = _health_section('ocr', lambda: importlib.import_module('ocr_engine').ocr_status())
+    report['groq'] = _health_section('groq', lambda: importlib.import_module('groq_parser').get_groq_stats())
+    response = jsonify(report)
     response.headers['Access-Control-Allow-Origin'] = '*'
     return response
 
@@ -165,5 +250,13 @@ def test_endpoint():
     print("Test endpoint called")
     return jsonify({'message': 'Server is working', 'method': request.method})
 
+def start_background_tasks():
+    """Start the session janitor and hook its evictions into active_sessions"""
+    from session_janitor import start_janitor
+    janitor = start_janitor()
+    if forget_session not in janitor.on_evict:
+        janitor.on_evict.append(forget_session)
+
 if __name__ == '__main__':
+    start_background_tasks()
     app.run(debug=False, host='0.0.0.0', port=8000)
\ No newline at end of file
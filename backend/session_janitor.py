@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SESSIONS_DIR = Path("taxes_files")
+
+def directory_size(path):
+    """Total size in bytes of the files under a single session directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _is_session_id(name):
+    try:
+        return str(uuid.UUID(name)) == name
+    except ValueError:
+        return False
+
+class SessionIndex:
+    """On-disk index of session sizes and access times
+
+    Updates are appended to a journal, so recording a session costs O(1) and the
+    janitor never has to walk taxes_files to find eviction candidates. Entries are
+    kept in least-recently-used order and the journal is compacted when it grows.
+    """
+
+    def __init__(self, sessions_dir=SESSIONS_DIR):
+        self.sessions_dir = Path(sessions_dir)
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.sessions_dir / ".session_index.jsonl"
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.journal_lines = 0
+        if self.journal_path.exists():
+            self._replay()
+        else:
+            self._adopt_existing_sessions()
+
+    def _replay(self):
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.journal_lines += 1
+                if record.get('op') == 'remove':
+                    self._drop(record['session_id'])
+                else:
+                    self._apply(record['session_id'], record['bytes'], record['last_access'], record['created_at'])
+        # Sessions removed outside the janitor
+        for session_id in [s for s in self.entries if not (self.sessions_dir / s).exists()]:
+            self._drop(session_id)
+        self._compact()
+
+    def _adopt_existing_sessions(self):
+        """One-time scan of the top level of taxes_files for sessions created before the index existed"""
+        sessions = []
+        with os.scandir(self.sessions_dir) as it:
+            for entry in it:
+                if entry.is_dir() and _is_session_id(entry.name):
+                    mtime = entry.stat().st_mtime
+                    sessions.append((mtime, entry.name, directory_size(entry.path)))
+        for mtime, session_id, size in sorted(sessions):
+            self._apply(session_id, size, mtime, mtime)
+        self._compact()
+
+    def _apply(self, session_id, size, last_access, created_at):
+        previous = self.entries.pop(session_id, None)
+        if previous:
+            self.total_bytes -= previous['bytes']
+            created_at = previous['created_at']
+        self.entries[session_id] = {'bytes': size, 'last_access': last_access, 'created_at': created_at}
+        self.total_bytes += size
+
+    def _drop(self, session_id):
+        previous = self.entries.pop(session_id, None)
+        if previous:
+            self.total_bytes -= previous['bytes']
+        return previous
+
+    def _append(self, record):
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        self.journal_lines += 1
+        if self.journal_lines > 2 * len(self.entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        temp_path = self.journal_path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            for session_id, entry in self.entries.items():
+                f.write(json.dumps(dict(entry, session_id=session_id, op='touch')) + "\n")
+        os.replace(temp_path, self.journal_path)
+        self.journal_lines = len(self.entries)
+
+    def touch(self, session_id, size=None):
+        """Record an access to a session, optionally with its current size in bytes"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if size is None:
+                size = entry['bytes'] if entry else 0
+            self._apply(session_id, size, now, now)
+            self._append({'op': 'touch', 'session_id': session_id, 'bytes': size,
+                          'last_access': now, 'created_at': self.entries[session_id]['created_at']})
+
+    def remove(self, session_id):
+        """Forget a session, returning its entry if it was tracked"""
+        with self.lock:
+            previous = self._drop(session_id)
+            if previous:
+                self._append({'op': 'remove', 'session_id': session_id})
+            return previous
+
+    def oldest(self):
+        """Least recently used session as (session_id, entry), or None"""
+        with self.lock:
+            if not self.entries:
+                return None
+            session_id = next(iter(self.entries))
+            return session_id, dict(self.entries[session_id])
+
+    def get_stats(self):
+        with self.lock:
+            return {'tracked_sessions': len(self.entries), 'tracked_bytes': self.total_bytes}
+
+class SessionJanitor:
+    """Background thread that evicts expired sessions and keeps taxes_files under a disk quota"""
+
+    def __init__(self, index, ttl_hours=None, quota_mb=None, interval_seconds=None, min_age_seconds=None):
+        self.index = index
+        if ttl_hours is None:
+            ttl_hours = float(os.getenv('SESSION_TTL_HOURS', '24'))
+        if quota_mb is None:
+            quota_mb = float(os.getenv('SESSION_QUOTA_MB', '2048'))
+        if interval_seconds is None:
+            interval_seconds = float(os.getenv('SESSION_JANITOR_INTERVAL_SECONDS', '300'))
+        if min_age_seconds is None:
+            # Sessions touched more recently than this are never evicted for quota,
+            # so in-flight requests keep their files
+            min_age_seconds = float(os.getenv('SESSION_MIN_AGE_SECONDS', '900'))
+        self.ttl_seconds = ttl_hours * 3600
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.interval_seconds = interval_seconds
+        self.min_age_seconds = min_age_seconds
+        self.on_evict = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.metrics = {
+            'runs': 0,
+            'evicted_sessions': 0,
+            'ttl_evictions': 0,
+            'quota_evictions': 0,
+            'reclaimed_bytes': 0,
+            'last_run': None
+        }
+
+    def _evict(self, session_id, reason):
+        entry = self.index.remove(session_id)
+        path = self.index.sessions_dir / session_id
+        reclaimed = entry['bytes'] if entry else 0
+        shutil.rmtree(path, ignore_errors=True)
+        self.metrics['evicted_sessions'] += 1
+        self.metrics[f'{reason}_evictions'] += 1
+        self.metrics['reclaimed_bytes'] += reclaimed
+        print(f"Janitor evicted session {session_id} ({reason}, {reclaimed} bytes)")
+        for callback in self.on_evict:
+            try:
+                callback(session_id)
+            except Exception as e:
+                print(f"Janitor eviction callback error: {e}")
+
+    def run_once(self):
+        """Evict expired sessions, then the least recently used ones while over quota"""
+        now = time.time()
+        while True:
+            oldest = self.index.oldest()
+            if not oldest:
+                break
+            session_id, entry = oldest
+            age = now - entry['last_access']
+            if age > self.ttl_seconds:
+                self._evict(session_id, 'ttl')
+            elif self.index.total_bytes > self.quota_bytes and age > self.min_age_seconds:
+                self._evict(session_id, 'quota')
+            else:
+                break
+        self.metrics['runs'] += 1
+        self.metrics['last_run'] = now
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Janitor error: {e}")
+            self.stop_event.wait(self.interval_seconds)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name="session-janitor", daemon=True)
+        self.thread.start()
+        print(f"Session janitor started (TTL {self.ttl_seconds / 3600:.1f} h, quota {self.quota_bytes / 1024 / 1024:.0f} MB)")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def get_stats(self):
+        return dict(self.metrics, **self.index.get_stats())
+
+_session_index = None
+_janitor = None
+_lock = threading.Lock()
+
+def get_session_index():
+    """Process-wide session index"""
+    global _session_index
+    with _lock:
+        if _session_index is None:
+            _session_index = SessionIndex()
+        return _session_index
+
+def get_janitor():
+    """Process-wide janitor, created on first use but only running once started"""
+    global _janitor
+    index = get_session_index()
+    with _lock:
+        if _janitor is None:
+            _janitor = SessionJanitor(index)
+        return _janitor
+
+def start_janitor():
+    janitor = get_janitor()
+    janitor.start()
+    return janitor
@@ -37,18 +37,43 @@ def create_directories():
     
     print("Created necessary directories")
 
+def preload_ocr():
+    """Load the EasyOCR model before accepting requests"""
+    if os.getenv('OCR_PRELOAD', 'true').lower() != 'true':
+        return
+    import time
+    from ocr_engine import start_ocr_backend
+    start = time.perf_counter()
+    if start_ocr_backend():
+        print(f"EasyOCR model loaded in {time.perf_counter() - start:.1f}s")
+    else:
+        print("EasyOCR model not preloaded, scanned Aadhar cards will load it on first use")
+
+def preload_template():
+    """Parse the ITR template once so the first Excel fill gets a cached copy"""
+    if os.getenv('TEMPLATE_PRELOAD', 'true').lower() != 'true' or not Path("itr_temp.xlsx").exists():
+        return
+    from template_cache import get_template_cache
+    cache = get_template_cache()
+    if cache:
+        cache.get("itr_temp.xlsx")
+        print("ITR template cached")
+
 def main():
     """Start production server"""
     print("Starting TaxES Production Server...")
     
     setup_environment()
     create_directories()
+    preload_ocr()
+    preload_template()
     
     print("Environment optimized for production")
     print("Starting Flask server on http://localhost:8000")
     
     # Import and run server
-    from server import app
+    from server import app, start_background_tasks
+    start_background_tasks()
     app.run(
         debug=False,
         host='0.0.0.0',
@@ -0,0 +1,70 @@
+import os
+import pickle
+import threading
+from dotenv import load_dotenv
+from openpyxl import load_workbook
+
+load_dotenv()
+
+class TemplateCache:
+    """ITR template workbooks parsed once per process and handed out as independent copies
+
+    load_workbook on the template takes most of the Excel stage; a pickled snapshot of
+    the parsed workbook is kept instead and unpickled for each fill, which is an order
+    of magnitude cheaper. The snapshot is rebuilt when the file's mtime or size changes.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.metrics = {'loads': 0, 'hits': 0}
+
+    def get(self, template_path):
+        """A fresh, writable workbook for the template"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != signature:
+                if entry is not None:
+                    print(f"Template {template_path} changed, reloading")
+                workbook = load_workbook(path)
+                self.entries[path] = (signature, pickle.dumps(workbook, protocol=pickle.HIGHEST_PROTOCOL))
+                self.metrics['loads'] += 1
+                return workbook
+            self.metrics['hits'] += 1
+            snapshot = entry[1]
+        return pickle.loads(snapshot)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.metrics, templates=len(self.entries),
+                        snapshot_bytes=sum(len(entry[1]) for entry in self.entries.values()))
+
+_template_cache = None
+_lock = threading.Lock()
+
+def template_cache_enabled():
+    return os.getenv('TEMPLATE_CACHE_ENABLED', 'true').lower() == 'true'
+
+def get_template_cache():
+    """Process-wide template cache, or None when disabled"""
+    global _template_cache
+    if not template_cache_enabled():
+        return None
+    with _lock:
+        if _template_cache is None:
+            _template_cache = TemplateCache()
+        return _template_cache
+
+def load_template(template_path):
+    """Workbook for a template, from the cache when it is enabled"""
+    cache = get_template_cache()
+    if cache is None:
+        return load_workbook(str(template_path))
+    return cache.get(template_path)
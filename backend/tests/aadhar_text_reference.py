@@ -0,0 +1,143 @@
+import re
+
+# The per-field Aadhar extractors as they were before aadhar_text_scanner.py
+# replaced them: the baseline the scanner is tested and benchmarked against.
+
+def clean_text_line(line):
+    """Clean unwanted characters and Hindi text"""
+    # Remove Hindi/Devanagari characters
+    line = re.sub(r'[ऀ-ॿ]+', '', line)
+    # Remove other non-English characters but keep alphanumeric, spaces, and common punctuation
+    line = re.sub(r'[^A-Za-z0-9\s,./-]+', ' ', line)
+    # Remove extra spaces
+    line = ' '.join(line.split()).strip()
+    return line
+
+def extract_aadhar_number(text):
+    """Extract 12-digit aadhar number"""
+    patterns = [
+        r'\b(\d{4})\s+(\d{4})\s+(\d{4})\b',
+        r'\b(\d{4})-(\d{4})-(\d{4})\b',
+        r'\b(\d{12})\b'
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text)
+        for m in matches:
+            num = ''.join(m) if isinstance(m, tuple) else m
+            if len(num) == 12 and num.isdigit() and num[0] not in ['0', '1']:
+                return f"{num[:4]} {num[4:8]} {num[8:]}"
+    return None
+
+def extract_dob(text):
+    """Extract DOB in dd/mm/yyyy or dd-mm-yyyy"""
+    patterns = [
+        r'DOB[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
+        r'Birth[\s:]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
+        r'\b(\d{2})[\/\-](\d{2})[\/\-](19|20\d{2})\b'
+    ]
+    for pat in patterns:
+        match = re.search(pat, text, re.IGNORECASE)
+        if match:
+            return f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
+    return None
+
+def extract_name(text):
+    """Extract name from line above DOB"""
+    lines = [l.strip() for l in text.split('\n') if l.strip()]
+    for i, line in enumerate(lines):
+        if 'DOB' in line.upper() or re.search(r'\d{2}[\/\-]\d{2}[\/\-]\d{4}', line):
+            for j in range(i - 1, max(-1, i - 4), -1):
+                prev = clean_text_line(lines[j])
+                if re.match(r'^[A-Za-z\s.]{3,50}$', prev):
+                    return prev.strip()
+    return None
+
+def extract_gender(text):
+    """Extract gender (handles IFEMALE, IMALE, etc.)"""
+    text_u = text.upper()
+    if re.search(r'I?FEMALE', text_u):
+        return "Female"
+    if re.search(r'I?MALE', text_u) and 'FEMALE' not in text_u:
+        return "Male"
+    return None
+
+def extract_address(text):
+    """Extract address from page 2 after 'Address' keyword"""
+    lines = [clean_text_line(l) for l in text.split('\n') if l.strip()]
+
+    address_lines = []
+    found_address_keyword = False
+
+    for i, line in enumerate(lines):
+        line_upper = line.upper()
+
+        if re.search(r'\bADDRESS\b', line_upper) and len(line) < 30:
+            found_address_keyword = True
+            if ':' in line:
+                after_colon = line.split(':', 1)[1].strip()
+                if len(after_colon) > 3:
+                    address_lines.append(after_colon)
+            continue
+
+        if found_address_keyword:
+            if len(line) < 3:
+                continue
+
+            if re.search(r'\d{4}\s?\d{4}\s?\d{4}', line):
+                continue
+
+            if any(keyword in line_upper for keyword in ['GOVERNMENT', 'UIDAI', 'UNIQUE', 'ISSUED']):
+                continue
+
+            is_address_line = any([
+                re.search(r'\b\d{6}\b', line),
+                any(w in line_upper for w in ['S/O', 'C/O', 'D/O', 'W/O']),
+                any(w in line_upper for w in ['DIST', 'DISTRICT', 'STATE', 'VILLAGE', 'CITY', 'TOWN']),
+                ',' in line,
+                re.search(r'\b(ROAD|STREET|LANE|COLONY|NAGAR|GANJ|PUR)\b', line_upper),
+                len(line) > 10
+            ])
+
+            if is_address_line:
+                address_lines.append(line)
+
+            if len(address_lines) >= 5:
+                break
+
+            if any(keyword in line_upper for keyword in ['ENROLLMENT', 'DOWNLOAD', 'HELP']):
+                break
+
+    if not address_lines:
+        for i, line in enumerate(lines):
+            if re.search(r'\b\d{6}\b', line):
+                start = max(0, i - 3)
+                for j in range(start, min(i + 2, len(lines))):
+                    clean_line = lines[j]
+                    if (len(clean_line) > 5 and
+                        not re.search(r'\d{4}\s?\d{4}\s?\d{4}', clean_line) and
+                        not any(k in clean_line.upper() for k in ['GOVERNMENT', 'UIDAI'])):
+                        address_lines.append(clean_line)
+                if address_lines:
+                    break
+
+    if address_lines:
+        seen = set()
+        unique_lines = []
+        for line in address_lines:
+            if line not in seen:
+                seen.add(line)
+                unique_lines.append(line)
+
+        return ', '.join(unique_lines)
+
+    return None
+
+def extract_fields(text):
+    """Every field with the original per-field extractors"""
+    return {
+        'aadhar_number': extract_aadhar_number(text),
+        'name': extract_name(text),
+        'dob': extract_dob(text),
+        'gender': extract_gender(text),
+        'address': extract_address(text)
+    }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Tests never read a locally built PIN index or .env overrides of these
+os.environ['PIN_INDEX_PATH'] = os.path.join(BACKEND_DIR, 'tests', 'no_pin_index.bin')
+os.environ['ADDRESS_RULES_THRESHOLD'] = '0.8'
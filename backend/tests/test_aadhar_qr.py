@@ -0,0 +1,49 @@
+import gzip
+import random
+import sys
+import aadhar_qr
+
+def secure_payload(fields, padding=0):
+    """A synthetic secure QR payload: gzip of the 0xFF-separated record, as a decimal integer"""
+    record = b'\xff'.join(value.encode('ISO-8859-1') for value in fields)
+    # Stand-in for the photo and signature that follow the text fields
+    record += b'\xff' + random.Random(0).randbytes(padding)
+    number = int.from_bytes(gzip.compress(record), 'big')
+    # Building the string needs the limit lifted; decoding it must not
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        return str(number)
+    finally:
+        sys.set_int_max_str_digits(limit)
+
+FIELDS = ['V2', '3', '012320190101123456789', 'Test Person', '18-09-1999', 'F', 'D/O Someone',
+          'North East Delhi', '', 'E-376', 'Ashok Nagar', '110093', 'Shahdara', 'Delhi', 'Street No. 15',
+          'Shahdara', 'Delhi']
+
+def test_secure_qr_longer_than_int_conversion_limit():
+    payload = secure_payload(FIELDS, padding=2048)
+    assert len(payload) > 4300
+
+    fields = aadhar_qr.decode_qr_payload(payload)
+    assert fields == {
+        'aadhar_number': None,
+        'name': 'Test Person',
+        'dob': '18/09/1999',
+        'gender': 'Female',
+        'address': 'D/O Someone, E-376, Street No. 15, Ashok Nagar, Delhi, Shahdara, Shahdara, '
+                   'North East Delhi, Delhi, 110093',
+        'last_four_digits': '0123'
+    }
+
+def test_xml_qr():
+    payload = ('<?xml version="1.0" encoding="UTF-8"?> <PrintLetterBarcodeData uid="234567890123" '
+               'name="Test Person" gender="M" yob="1999" co="S/O Ram Lal" house="12" street="MG Road" '
+               'vtc="Bangalore" dist="Bangalore" state="Karnataka" pc="560001" dob="1999-09-18"/>')
+    assert aadhar_qr.decode_qr_payload(payload) == {
+        'aadhar_number': '2345 6789 0123',
+        'name': 'Test Person',
+        'dob': '18/09/1999',
+        'gender': 'Male',
+        'address': 'S/O Ram Lal, 12, MG Road, Bangalore, Bangalore, Karnataka, 560001'
+    }
@@ -0,0 +1,50 @@
+import random
+import pytest
+from aadhar_text_reference import extract_fields
+from aadhar_text_scanner import scan_aadhar_text
+
+SAMPLE = """Government of India
+Test Person
+DOB : 18/09/1999
+FEMALE
+2345 6789 0123
+VID : 9111 8122 7978 3936
+Address:
+D/O Someone H. No. E - 376 Street
+No. 15 Ashok Nagar Shahdara
+North East Delhi - 110093
+2345 6789 0123
+help@uidai.gov.in"""
+
+# OCR-like lines covering every branch of the original extractors
+LINES = [
+    "Government of India", "भारत सरकार", "Unique Identification Authority of India",
+    "Test Person", "RAHUL KUMAR", "Priya S. Sharma", "राहुल कुमार Rahul Kumar", "Ab", "X1 Y2",
+    "DOB : 18/09/1999", "DOB: 01-01-1985", "Date of Birth: 05/12/2001", "Year of Birth 1999",
+    "12/03/1975", "31-12-2020", "dob 07/07/1977",
+    "FEMALE", "MALE", "IMALE", "IFEMALE", "पुरुष / Male", "महिला / Female",
+    "2345 6789 0123", "1234 5678 9012", "2345-6789-0123", "234567890123", "0345 6789 0123",
+    "VID : 9111 8122 7978 3936", "Address:", "Address: S/O Ram Lal, Village Rampur",
+    "पता Address", "Address", "C/O Mohan Das", "W/O Suresh", "H. No. E - 376 Street",
+    "No. 15 Ashok Nagar Shahdara", "Gandhi Road", "MG STREET", "Dist Lucknow", "State Uttar Pradesh",
+    "North East Delhi - 110093", "Lucknow 226001", "PIN 400001", "Kanpur, UP", "Ward 12",
+    "Enrollment No: 1234/56789/01234", "Download Date: 01/02/2020", "help@uidai.gov.in",
+    "Issued Date", "www.uidai.gov.in", "1947", "", "   ", "ab", "!!", "Mera Aadhaar, Meri Pehchaan",
+]
+
+def random_text(rng):
+    return "\n".join(rng.choice(LINES) for _ in range(rng.randint(0, 16)))
+
+@pytest.mark.parametrize('text', [SAMPLE, "", "\n\n", SAMPLE.replace("FEMALE", "MALE"),
+                                  SAMPLE.replace("Address:", "Addr"), SAMPLE.lower()])
+def test_scanner_matches_original_extractors(text):
+    assert scan_aadhar_text(text) == extract_fields(text)
+
+def test_scanner_matches_original_extractors_on_random_texts():
+    rng = random.Random(37)
+    for _ in range(3000):
+        text = random_text(rng)
+        expected = extract_fields(text)
+        actual = scan_aadhar_text(text)
+        for field, value in expected.items():
+            assert actual[field] == value, (field, text)
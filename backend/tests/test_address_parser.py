@@ -0,0 +1,91 @@
+import pytest
+import pin_directory
+from address_parser import confidence_threshold, parse_address_rules
+
+FIELDS = ['flat_door_block_no', 'premises_building_village', 'road_street_post_office', 'area_locality',
+          'town_city_district', 'state', 'pin_code']
+
+@pytest.fixture
+def no_index(monkeypatch):
+    monkeypatch.setattr(pin_directory, '_directory', pin_directory.PinDirectory('/nonexistent/pin_index.bin'))
+
+@pytest.fixture
+def delhi_index(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'pincodes.csv'
+    csv_path.write_text(
+        "officename,pincode,Districtname,statename\n"
+        "Shahdara,110093,NORTH EAST DELHI,DELHI\n"
+        "Gomti Nagar,226010,LUCKNOW,UTTAR PRADESH\n"
+    )
+    index_path = str(tmp_path / 'pin_index.bin')
+    pin_directory.build_index(str(csv_path), index_path)
+    monkeypatch.setattr(pin_directory, '_directory', pin_directory.PinDirectory(index_path))
+
+def check(address, expected):
+    components, confidence = parse_address_rules(address)
+    assert {key: components[key] for key in FIELDS} == {key: expected.get(key, '') for key in FIELDS}
+    return confidence
+
+def test_state_is_not_stripped_from_district_name(no_index):
+    confidence = check(
+        "D/O: Someone, E-376, Street No. 15, Ashok Nagar, Shahdara, North East Delhi, Delhi, 110093",
+        {'flat_door_block_no': 'E-376', 'premises_building_village': 'Ashok Nagar',
+         'road_street_post_office': 'Street No. 15', 'area_locality': 'Shahdara',
+         'town_city_district': 'North East Delhi', 'state': 'Delhi', 'pin_code': '110093'}
+    )
+    # The city is a guess without the index, so Groq must still see this address
+    assert confidence < confidence_threshold()
+
+def test_indexed_district_is_stripped_from_locality(delhi_index):
+    check(
+        "DIO Mukesh Kumar H, 15 Ashok Nagar Shahdara Mandoli, Saboli North East Delhi, 110093",
+        {'flat_door_block_no': '15', 'premises_building_village': 'Ashok Nagar Shahdara Mandoli',
+         'area_locality': 'Saboli', 'town_city_district': 'North East Delhi', 'state': 'Delhi',
+         'pin_code': '110093'}
+    )
+
+def test_single_leftover_is_kept_as_city(no_index):
+    confidence = check(
+        "12, MG Road, Bangalore, 560001",
+        {'flat_door_block_no': '12', 'road_street_post_office': 'MG Road', 'town_city_district': 'Bangalore',
+         'state': 'Karnataka', 'pin_code': '560001'}
+    )
+    assert confidence < confidence_threshold()
+
+def test_flat_without_no_and_main_road(no_index):
+    check(
+        "S/O Ramesh, Flat 302, Sunrise Apartments, Main Road, Gomti Nagar, Lucknow, 226010",
+        {'flat_door_block_no': '302', 'premises_building_village': 'Sunrise Apartments',
+         'road_street_post_office': 'Main Road', 'area_locality': 'Gomti Nagar', 'town_city_district': 'Lucknow',
+         'state': 'Uttar Pradesh', 'pin_code': '226010'}
+    )
+
+def test_indexed_city_is_confident(delhi_index):
+    confidence = check(
+        "S/O Ramesh, Flat 302, Sunrise Apartments, Main Road, Gomti Nagar, Lucknow, 226010",
+        {'flat_door_block_no': '302', 'premises_building_village': 'Sunrise Apartments',
+         'road_street_post_office': 'Main Road', 'area_locality': 'Gomti Nagar', 'town_city_district': 'Lucknow',
+         'state': 'Uttar Pradesh', 'pin_code': '226010'}
+    )
+    assert confidence >= confidence_threshold()
+
+def test_district_prefix_and_post_office(no_index):
+    check(
+        "C/O Ram, 45/2, Rampur Village, PO Rampur, Dist Sitapur, Uttar Pradesh, 261001",
+        {'flat_door_block_no': '45/2', 'premises_building_village': 'Rampur Village',
+         'road_street_post_office': 'PO Rampur', 'town_city_district': 'Sitapur', 'state': 'Uttar Pradesh',
+         'pin_code': '261001'}
+    )
+
+def test_flat_no_with_relation(no_index):
+    check(
+        "S/O Raj Kumar, Flat No 12B, Green Park Apartments, MG Road, Near Temple, Bangalore, Karnataka, 560001",
+        {'flat_door_block_no': '12B', 'premises_building_village': 'Green Park Apartments',
+         'road_street_post_office': 'MG Road', 'area_locality': 'Near Temple', 'town_city_district': 'Bangalore',
+         'state': 'Karnataka', 'pin_code': '560001'}
+    )
+
+def test_shared_prefix_gives_no_state(no_index):
+    components, _ = parse_address_rules("12, Gandhi Road, Villupuram, 605602")
+    assert components['state'] == ''
+    assert components['town_city_district'] == 'Villupuram'
@@ -0,0 +1,30 @@
+import document_cache
+from document_cache import DocumentCache
+
+def cached_output(tmp_path, name='aadhar_parsed.json'):
+    output = tmp_path / name
+    output.write_text('{"name": "Test Person"}')
+    return output
+
+def test_entry_is_served_while_fingerprint_matches(tmp_path):
+    cache = DocumentCache(cache_dir=tmp_path / 'cache')
+    output = cached_output(tmp_path)
+    cache.store('aadhar_extractor', 'abc', [output], 'success')
+    output.unlink()
+    assert cache.restore('aadhar_extractor', 'abc', [output]) == 'success'
+    assert output.read_text() == '{"name": "Test Person"}'
+
+def test_changed_setting_misses(tmp_path, monkeypatch):
+    cache = DocumentCache(cache_dir=tmp_path / 'cache')
+    output = cached_output(tmp_path)
+    monkeypatch.setenv('AADHAR_OCR_MODE', 'roi')
+    cache.store('aadhar_extractor', 'abc', [output], 'success')
+    monkeypatch.setenv('AADHAR_OCR_MODE', 'page')
+    assert cache.restore('aadhar_extractor', 'abc', [output]) is None
+
+def test_changed_extractor_code_misses(tmp_path, monkeypatch):
+    cache = DocumentCache(cache_dir=tmp_path / 'cache')
+    output = cached_output(tmp_path, 'form16_parsed.json')
+    cache.store('form16_parser', 'abc', [output], 'success')
+    monkeypatch.setitem(document_cache._source_digests, 'form16_parser.py', 'edited')
+    assert cache.restore('form16_parser', 'abc', [output]) is None
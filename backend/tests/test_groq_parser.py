@@ -0,0 +1,69 @@
+import json
+import pytest
+from groq_parser import GroqParser
+
+NAME = "Test Kumar Person"
+ADDRESS = "S/O Someone, 12, Gandhi Road, Ward 4, Villianur, 605602"
+
+@pytest.fixture
+def parser(monkeypatch):
+    monkeypatch.setenv('PARSE_CACHE_ENABLED', 'false')
+    parser = GroqParser()
+    # Skip the rule-based bypass so every address reaches the model
+    monkeypatch.setattr(parser, '_rule_based_address', lambda address: None)
+    return parser
+
+def reply_with(monkeypatch, parser, response):
+    monkeypatch.setattr(parser, '_call_groq_api', lambda prompt, max_tokens=200: json.dumps(response))
+
+FULL_ADDRESS = {'flat_door_block_no': '12', 'premises_building_village': 'Ward 4',
+                'road_street_post_office': 'Gandhi Road', 'area_locality': 'Villianur',
+                'town_city_district': 'Villianur', 'state': 'Puducherry', 'pin_code': '605602'}
+
+def test_complete_response_is_used(monkeypatch, parser):
+    reply_with(monkeypatch, parser, {
+        'name': {'first_name': 'Test', 'middle_name': 'Kumar', 'last_name': 'Person'},
+        'address': dict(FULL_ADDRESS)
+    })
+    result = parser.parse_name_and_address(NAME, ADDRESS)
+    assert result['name'] == {'first_name': 'Test', 'middle_name': 'Kumar', 'last_name': 'Person'}
+    assert result['address']['premises_building_village'] == 'Ward 4'
+
+def test_empty_fields_fall_back(monkeypatch, parser):
+    reply_with(monkeypatch, parser, {'name': {}, 'address': {}})
+    result = parser.parse_name_and_address(NAME, ADDRESS)
+    assert result['name'] == parser._fallback_name_parse(NAME)
+    assert result['address'] == parser._fallback_address_parse(ADDRESS)
+
+def test_partial_fields_fall_back(monkeypatch, parser):
+    partial = {key: FULL_ADDRESS[key] for key in ['flat_door_block_no', 'town_city_district', 'state', 'pin_code']}
+    reply_with(monkeypatch, parser, {'name': {'first_name': 'Test'}, 'address': partial})
+    result = parser.parse_name_and_address(NAME, ADDRESS)
+    assert result['name'] == parser._fallback_name_parse(NAME)
+    assert result['address'] == parser._fallback_address_parse(ADDRESS)
+
+def test_malformed_field_falls_back_alone(monkeypatch, parser):
+    reply_with(monkeypatch, parser, {
+        'name': {'first_name': 'Test', 'middle_name': 'Kumar', 'last_name': 'Person'},
+        'address': "12, Gandhi Road"
+    })
+    result = parser.parse_name_and_address(NAME, ADDRESS)
+    assert result['name'] == {'first_name': 'Test', 'middle_name': 'Kumar', 'last_name': 'Person'}
+    assert result['address'] == parser._fallback_address_parse(ADDRESS)
+
+def test_malformed_parses_are_not_cached(monkeypatch, tmp_path, parser):
+    import groq_parser
+    from parse_cache import ParseCache
+    cache = ParseCache(db_path=tmp_path / 'parse_cache.sqlite3')
+    monkeypatch.setattr(groq_parser, 'get_parse_cache', lambda: cache)
+
+    reply_with(monkeypatch, parser, {'name': {}, 'address': {}})
+    parser.parse_name_and_address(NAME, ADDRESS)
+    reply_with(monkeypatch, parser, {})
+    assert parser.parse_name(NAME) == parser._fallback_name_parse(NAME)
+    assert parser.parse_address(ADDRESS) == parser._fallback_address_parse(ADDRESS)
+    assert cache.get_stats()['disk_entries'] == 0
+
+    reply_with(monkeypatch, parser, dict(FULL_ADDRESS))
+    parser.parse_address(ADDRESS)
+    assert cache.get('address', ADDRESS)['premises_building_village'] == 'Ward 4'
@@ -0,0 +1,18 @@
+import numpy as np
+from ocr_engine import OCRBatcher
+
+def batch_sizes(shapes, pad_limit=1.5, max_images=8):
+    batcher = OCRBatcher.__new__(OCRBatcher)
+    batcher.pad_limit = pad_limit
+    batcher.max_images = max_images
+    requests = [{'group': 'default', 'image': np.zeros(shape, dtype=np.uint8)} for shape in shapes]
+    return [len(batch) for batch in batcher._batches(requests)]
+
+def test_small_crop_is_not_padded_to_a_full_page():
+    assert batch_sizes([(1000, 1000)] * 7 + [(100, 100)]) == [7, 1]
+
+def test_similar_pages_share_a_batch():
+    assert batch_sizes([(1000, 1000), (900, 1000), (1000, 950)]) == [3]
+
+def test_batches_are_capped():
+    assert batch_sizes([(100, 100)] * 10, max_images=4) == [4, 4, 2]
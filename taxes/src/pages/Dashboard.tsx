@@ -18,7 +18,7 @@ import {
   Phone
 } from "lucide-react";
 import { toast } from "sonner";
-import { uploadDocumentsToAPI } from "@/services/apiService";
+import { resumeProcessingAPI, uploadDocumentsToAPI } from "@/services/apiService";
 
 interface UploadedFile {
   id: string;
@@ -139,7 +139,7 @@ export const Dashboard = () => {
       toast.info("Uploading documents to secure cloud storage...");
       console.log('Starting document processing...');
       
-      const result = await uploadDocumentsToAPI(
+      let result = await uploadDocumentsToAPI(
         user.id,
         aadharFile,
         passbookFile,
@@ -149,14 +149,30 @@ export const Dashboard = () => {
       );
       
       console.log('Processing result:', result);
+
+      // Retry the failed stages once; completed stages are reused from the session
+      if (result.resumable && result.session_id) {
+        toast.info("Some documents could not be processed, retrying...");
+        try {
+          result = await resumeProcessingAPI(result.session_id, email, mobileNo);
+          console.log('Resume result:', result);
+        } catch (error) {
+          console.error('Error resuming processing:', error);
+        }
+      }
       
       if (result.success) {
-        toast.success("Documents processed successfully! Redirecting to download page...");
+        if (result.failed_stages && Object.keys(result.failed_stages).length > 0) {
+          toast.warning("Some details could not be extracted and may be missing from your form. Redirecting to download page...");
+        } else {
+          toast.success("Documents processed successfully! Redirecting to download page...");
+        }
         
         // Redirect to output page with session ID
-        if (result.redirect_to) {
+        const redirectTo = result.redirect_to;
+        if (redirectTo) {
           setTimeout(() => {
-            window.location.href = result.redirect_to;
+            window.location.href = redirectTo;
           }, 2000);
         }
       } else {
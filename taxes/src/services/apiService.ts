@@ -9,6 +9,8 @@ export interface UploadDocumentsResponse {
   excel_result?: any;
   output_files?: any;
   redirect_to?: string;
+  resumable?: boolean;
+  failed_stages?: Record<string, any>;
 }
 
 export const uploadDocumentsToAPI = async (
@@ -44,21 +46,59 @@ export const uploadDocumentsToAPI = async (
     const responseText = await response.text();
     console.log('Raw response:', responseText);
     
+    return parseProcessingResponse(response, responseText);
+  } catch (error) {
+    console.error('API call error:', error);
+    throw error;
+  }
+};
+
+// Failed runs that kept their session come back as results the caller can resume
+const parseProcessingResponse = (response: Response, responseText: string): UploadDocumentsResponse => {
+  let result;
+  try {
+    result = JSON.parse(responseText);
+  } catch (parseError) {
+    console.error('JSON parse error:', parseError);
     if (!response.ok) {
-      console.error('Response error:', responseText);
       throw new Error(`Processing failed: ${response.statusText}`);
     }
+    throw new Error('Invalid response format from server');
+  }
 
-    let result;
-    try {
-      result = JSON.parse(responseText);
-    } catch (parseError) {
-      console.error('JSON parse error:', parseError);
-      throw new Error('Invalid response format from server');
-    }
-    
-    console.log('Parsed response data:', result);
-    return result;
+  if (!response.ok && !(result.resumable && result.session_id)) {
+    console.error('Response error:', responseText);
+    throw new Error(result.message || `Processing failed: ${response.statusText}`);
+  }
+
+  console.log('Parsed response data:', result);
+  return result;
+};
+
+export const resumeProcessingAPI = async (
+  sessionId: string,
+  email?: string,
+  mobileNo?: string
+): Promise<UploadDocumentsResponse> => {
+  try {
+    console.log('Resuming session:', sessionId);
+
+    const response = await fetch(`${API_BASE_URL}/resume-processing`, {
+      method: 'POST',
+      body: JSON.stringify({ session_id: sessionId, email: email || '', mobile_no: mobileNo || '' }),
+      headers: {
+        'Accept': 'application/json',
+        'Content-Type': 'application/json',
+      },
+      signal: AbortSignal.timeout(300000), // 5 minutes timeout
+    });
+
+    console.log('Response status:', response.status);
+
+    const responseText = await response.text();
+    console.log('Raw response:', responseText);
+
+    return parseProcessingResponse(response, responseText);
   } catch (error) {
     console.error('API call error:', error);
     throw error;